@@ -0,0 +1,97 @@
+from functools import wraps
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# ----------------------------------------------------------------------------#
+# Admin access.
+#
+# There are no user accounts, so admin requests carry a token signed with
+# ADMIN_SECRET (``flask admin-token`` prints one) in an X-Admin-Token header,
+# or in a cookie set by submitting it to /admin/login. Tokens are never taken
+# from the URL, which ends up in profiles, traces and logs. Without
+# ADMIN_SECRET every admin feature is off. The secret must be shared by all
+# workers, unlike the per-process SECRET_KEY.
+# ----------------------------------------------------------------------------#
+
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+COOKIE = "admin_token"
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config["ADMIN_SECRET"], salt="admin")
+
+
+def make_admin_token():
+    return _serializer().dumps("admin")
+
+
+def _is_valid(token):
+    try:
+        _serializer().loads(token, max_age=current_app.config["ADMIN_TOKEN_MAX_AGE"])
+    except BadSignature:
+        return False
+    return True
+
+
+def admin_token():
+    """The admin token of the current request, if it is valid."""
+    if not current_app.config["ADMIN_SECRET"]:
+        return None
+
+    token = request.headers.get("X-Admin-Token") or request.cookies.get(COOKIE)
+    if not token or not _is_valid(token):
+        return None
+    return token
+
+
+def is_admin():
+    return admin_token() is not None
+
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(**kwargs):
+        # Admin pages do not reveal that they exist.
+        if not is_admin():
+            abort(404)
+        return view(**kwargs)
+
+    return wrapper
+
+
+@admin.route("/login", methods=["GET", "POST"])
+def login():
+    if not current_app.config["ADMIN_SECRET"]:
+        abort(404)
+
+    token = request.form.get("token", "").strip()
+    if request.method == "GET" or not _is_valid(token):
+        return render_template("admin/login.html", failed=request.method == "POST")
+
+    response = redirect(url_for("admin.profiles"))
+    response.set_cookie(
+        COOKIE,
+        token,
+        max_age=current_app.config["ADMIN_TOKEN_MAX_AGE"],
+        secure=request.is_secure,
+        httponly=True,
+        samesite="Strict",
+    )
+    return response
+
+
+@admin.route("/logout")
+def logout():
+    response = redirect(url_for("index"))
+    response.delete_cookie(COOKIE)
+    return response
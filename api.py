@@ -0,0 +1,221 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+
+from dataloader import by_id_loader
+from helper import group_by
+from models import Venue, Artist, Show
+from pagination import encode_cursor, decode_cursor, after_cursor, is_id
+
+# ----------------------------------------------------------------------------#
+# JSON API, version 1.
+#
+# Read-only listings and entities for machine clients. ``fields=a,b`` picks
+# the columns to return and only those are selected; ``include=shows`` adds
+# each venue's or artist's shows, loaded with one query per page. Venues and
+# artists embedded in shows, and ``ids=1,2,3`` multi-gets, go through the
+# per-request loaders in dataloader.py.
+# ----------------------------------------------------------------------------#
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Bookkeeping columns that are not part of the API.
+PRIVATE_COLUMNS = {"version", "counted_as_past"}
+
+SHOW_FIELDS = ("id", "venue_id", "artist_id", "start_time")
+
+# Columns of a venue or artist embedded in a show.
+EMBED_FIELDS = ("id", "name", "city", "state", "image_link")
+
+# Query arguments carried over to the next page of a listing.
+LIST_ARGS = ("fields", "include", "limit")
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api.errorhandler(ApiError)
+def api_error(error):
+    return jsonify({"error": error.message}), error.status
+
+
+class Resource:
+    def __init__(self, model, show_fk=None, embeds=None):
+        self.model = model
+        self.show_fk = show_fk
+        # include= name -> (model, foreign key attribute) of one-to-one embeds.
+        self.embeds = embeds or {}
+        self.fields = [
+            column.key
+            for column in model.__table__.columns
+            if column.key not in PRIVATE_COLUMNS
+        ]
+
+    def columns(self, includes=()):
+        """Columns named by ``fields=``, always including the id, and the
+        names of columns selected only for ``includes`` (foreign keys of
+        embeds), which are dropped from the output."""
+        names = request.args.get("fields")
+        if not names:
+            return [getattr(self.model, name) for name in self.fields], set()
+
+        names = ["id"] + [name.strip() for name in names.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+
+        keys = {self.embeds[name][1] for name in includes if name in self.embeds}
+        hidden = keys - set(names)
+        columns = [getattr(self.model, name) for name in dict.fromkeys(names)]
+        return columns + [getattr(self.model, key) for key in sorted(hidden)], hidden
+
+    def includes(self):
+        names = set(filter(None, request.args.get("include", "").split(",")))
+        allowed = set(self.embeds)
+        if self.show_fk is not None:
+            allowed.add("shows")
+        if names - allowed:
+            raise ApiError(f"Cannot include: {', '.join(sorted(names - allowed))}")
+        return names
+
+
+RESOURCES = {
+    "venues": Resource(Venue, Show.venue_id),
+    "artists": Resource(Artist, Show.artist_id),
+    "shows": Resource(
+        Show, embeds={"venue": (Venue, "venue_id"), "artist": (Artist, "artist_id")}
+    ),
+}
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _serialize(row):
+    return {key: _json_value(value) for key, value in row._mapping.items()}
+
+
+def _attach_shows(resource, items):
+    """Add a ``shows`` list to each item with a single IN query."""
+    fk = resource.show_fk
+    rows = (
+        Show.query.with_entities(*(getattr(Show, name) for name in SHOW_FIELDS))
+        .filter(fk.in_([item["id"] for item in items]))
+        .order_by(Show.start_time, Show.id)
+    )
+    shows = group_by(rows, lambda row: getattr(row, fk.key), _serialize)
+
+    for item in items:
+        item["shows"] = shows.get(item["id"], [])
+
+
+def _attach_embeds(resource, items, includes):
+    """Add the included venue/artist to each show. All lookups are queued
+    before the first is read, so each model is fetched with one query."""
+    pending = []
+    for name in includes & set(resource.embeds):
+        model, key = resource.embeds[name]
+        columns = [getattr(model, field) for field in EMBED_FIELDS]
+        loader = by_id_loader(model, columns)
+        pending += [(item, name, loader.load(item.get(key))) for item in items]
+
+    for item, name, deferred in pending:
+        row = deferred.get()
+        item[name] = None if row is None else _serialize(row)
+
+
+def _expand(resource, items, includes, hidden):
+    if not items:
+        return
+    if "shows" in includes:
+        _attach_shows(resource, items)
+    _attach_embeds(resource, items, includes)
+
+    for item in items:
+        for key in hidden:
+            del item[key]
+
+
+def _ids_arg():
+    try:
+        ids = [int(value) for value in request.args["ids"].split(",") if value]
+    except ValueError:
+        raise ApiError("ids must be a comma-separated list of integers")
+
+    if len(ids) > current_app.config["API_MAX_PAGE_SIZE"]:
+        raise ApiError("Too many ids")
+    return list(dict.fromkeys(ids))
+
+
+def _page_size():
+    size = request.args.get("limit", current_app.config["API_PAGE_SIZE"], type=int)
+    return max(1, min(size, current_app.config["API_MAX_PAGE_SIZE"]))
+
+
+@api.route("/<any(venues, artists, shows):kind>")
+def list_resource(kind):
+    resource = RESOURCES[kind]
+    model = resource.model
+    includes = resource.includes()
+
+    if "ids" in request.args:
+        return _multi_get(resource, includes)
+
+    page_size = _page_size()
+    columns, hidden = resource.columns(includes)
+    query = model.query.with_entities(*columns)
+    cursor = decode_cursor(request.args.get("after"), 1)
+    if cursor is not None and is_id(cursor[0]):
+        query = query.filter(after_cursor((model.id,), cursor))
+
+    rows = query.order_by(model.id).limit(page_size + 1).all()
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_url = url_for(
+            "api.list_resource",
+            kind=kind,
+            **{key: request.args[key] for key in LIST_ARGS if key in request.args},
+            after=encode_cursor((rows[-1].id,)),
+        )
+
+    items = [_serialize(row) for row in rows]
+    _expand(resource, items, includes, hidden)
+
+    return jsonify({"data": items, "next": next_url})
+
+
+def _multi_get(resource, includes):
+    """Items for ``ids=`` in the requested order, plus the ids not found."""
+    ids = _ids_arg()
+    columns, hidden = resource.columns(includes)
+    rows = by_id_loader(resource.model, columns).load_many(ids)
+
+    items = [_serialize(row) for row in rows if row is not None]
+    _expand(resource, items, includes, hidden)
+
+    missing = [id_ for id_, row in zip(ids, rows) if row is None]
+    return jsonify({"data": items, "missing": missing})
+
+
+@api.route("/<any(venues, artists, shows):kind>/<int:item_id>")
+def get_resource(kind, item_id):
+    resource = RESOURCES[kind]
+    model = resource.model
+    includes = resource.includes()
+
+    columns, hidden = resource.columns(includes)
+    row = by_id_loader(model, columns).load(item_id).get()
+    if row is None:
+        raise ApiError("Not found", 404)
+
+    item = _serialize(row)
+    _expand(resource, [item], includes, hidden)
+
+    return jsonify({"data": item})
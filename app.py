@@ -2,20 +2,54 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, flash, redirect
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    flash,
+    redirect,
+    jsonify,
+    url_for,
+    abort,
+    stream_with_context,
+)
 from flask_moment import Moment
-import logging
-from logging import Formatter, FileHandler
 from forms import ArtistForm, VenueForm, ShowForm
+from enums import States
+import click
 from sqlalchemy import func
-from sqlalchemy.orm import noload
 from sqlalchemy.exc import SQLAlchemyError
 from helper import group_by, group_by_multiple_key
 from flask_migrate import Migrate
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta, timezone
 from models import db, Venue, Artist, Show
+from pagination import encode_cursor, decode_area_cursor, decode_time_cursor
+from pagination import after_cursor
+from counters import rollover_shows, recount_shows
+from search import search_by_name, search_all
+from suggest import PrefixIndex
+from itertools import chain
+from details import load_detail, load_past_shows, load_month
+from loaders import loader_profile
+from formatting import format_datetime
+from choices import ChoiceProvider
+from page_cache import page_cache, cached_page, add_cache_tags, area_tag
+from conditional import conditional_page, detail_version, table_version
+from conditional import shows_version
+from importer import IMPORTERS, import_file
+from exporter import EXPORTS, FORMATS, export_rows
+from api import api
+from explain import audit_routes, index_migration
+from sql_instrumentation import init_sql_stats
+from metrics import init_metrics
+from tracing import init_tracing
+from admin import admin, admin_required, make_admin_token
+from profiling import init_profiling
+from sampler import init_sampler
+from memtrack import init_memtrack, merged_report
+from logging_setup import configure_logging
 
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -24,24 +58,91 @@ from models import db, Venue, Artist, Show
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object("config")
+init_metrics(app)
 db.init_app(app)
 migrate = Migrate(app, db)
+app.register_blueprint(api)
+init_sql_stats(app)
+init_tracing(app)
+init_profiling(app)
+init_sampler(app)
+init_memtrack(app)
+app.register_blueprint(admin)
+artist_choices = ChoiceProvider(
+    Artist, app.config["CHOICES_CACHE_TTL"], app.config["SHOW_FORM_MAX_CHOICES"]
+)
+venue_choices = ChoiceProvider(
+    Venue, app.config["CHOICES_CACHE_TTL"], app.config["SHOW_FORM_MAX_CHOICES"]
+)
+suggest_index = PrefixIndex(app.config["SUGGEST_INDEX_TTL"])
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format="medium"):
-    date = dateutil.parser.parse(value) if isinstance(value, str) else value
-    if format == "full":
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == "medium":
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale="en")
+app.jinja_env.filters["datetime"] = format_datetime
 
+# ----------------------------------------------------------------------------#
+# Write hooks.
+#
+# Called by the handlers below after a successful commit to keep the
+# in-process suggestion index, form choices and page cache current.
+# ----------------------------------------------------------------------------#
+
+
+def venue_written(venue, previous_area=None):
+    suggest_index.add("venue", venue.id, venue.name)
+    venue_choices.invalidate()
+
+    area = (venue.state, venue.city)
+    page_cache.purge(f"venue:{venue.id}", "shows:list", area_tag(*area))
+    if previous_area != area:
+        # A new or moved venue shifts the /venues pages.
+        page_cache.purge("venues:list")
+
+
+def venue_deleted(venue):
+    suggest_index.remove("venue", venue.id)
+    venue_choices.invalidate()
+    page_cache.purge(f"venue:{venue.id}", "shows:list", "venues:list")
+
+
+def artist_written(artist):
+    suggest_index.add("artist", artist.id, artist.name)
+    artist_choices.invalidate()
+    page_cache.purge(f"artist:{artist.id}", "shows:list", "artists:list")
+
+
+# Unique (name, city, state) keys of venues and artists, which bulk imports
+# upsert on (see models.py).
+NATURAL_KEYS = ("uq_venue_name_city_state", "uq_artist_name_city_state")
+
+
+def duplicate_message(error):
+    """A message naming the clash when ``error`` violates a natural key, or
+    None for any other error."""
+    diag = getattr(getattr(error, "orig", None), "diag", None)
+    if getattr(diag, "constraint_name", None) not in NATURAL_KEYS:
+        return None
+
+    form = request.form
+    return f"{form['name']} is already listed in {form['city']}, {form['state']}."
+
+
+def show_written(show):
+    area = (
+        Venue.query.with_entities(Venue.state, Venue.city)
+        .filter(Venue.id == show.venue_id)
+        .first()
+    )
+    page_cache.purge(
+        f"venue:{show.venue_id}",
+        f"artist:{show.artist_id}",
+        "shows:list",
+        *([area_tag(*area)] if area else []),
+    )
 
-app.jinja_env.filters["datetime"] = format_datetime
 
 # ----------------------------------------------------------------------------#
 # Controllers.
@@ -54,21 +155,40 @@ def index():
 
 
 @app.route("/venues")
+@conditional_page(lambda: table_version(Venue))
+@cached_page(app.config["PAGE_CACHE_LIST_TTL"], "venues:list")
 def venues():
-    query_result = (
-        Venue.query.with_entities(
-            Venue.id,
-            Venue.state,
-            Venue.city,
-            Venue.name,
-            func.count(Show.venue_id).label("num_upcoming_shows"),
-        )
-        .outerjoin(Show, Show.venue_id == Venue.id)
-        .group_by(Venue.id, Venue.state, Venue.city, Venue.name, Show.venue_id)
-        .order_by(Venue.state, Venue.city)
-        .all()
+    page_size = app.config["VENUES_PAGE_SIZE"]
+    # Venues without a state or city are listed under an empty one, so that
+    # every row has a cursor (see ix_venue_state_city_id).
+    state = func.coalesce(Venue.state, "")
+    city = func.coalesce(Venue.city, "")
+    area_key = (state, city, Venue.id)
+
+    query = Venue.query.with_entities(
+        Venue.id,
+        state.label("state"),
+        city.label("city"),
+        Venue.name,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
     )
 
+    cursor = decode_area_cursor(request.args.get("after"))
+    if cursor is not None:
+        query = query.filter(after_cursor(area_key, cursor))
+
+    query_result = query.order_by(*area_key).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(query_result) > page_size:
+        query_result = keep_areas_intact(
+            query_result[:page_size], query_result[page_size]
+        )
+        last = query_result[-1]
+        next_cursor = encode_cursor((last.state, last.city, last.id))
+
+    add_cache_tags(*{area_tag(item.state, item.city) for item in query_result})
+
     data = group_by_multiple_key(
         query_result,
         lambda item: (item.city, item.state),
@@ -79,59 +199,150 @@ def venues():
         },
         ["city", "state"],
         "venues",
+        presorted=True,
     )
 
-    return render_template("pages/venues.html", areas=data)
+    return render_template("pages/venues.html", areas=data, next_cursor=next_cursor)
 
 
-@app.route("/venues/search", methods=["POST"])
-def search_venues():
-    search = f'%{request.form["search_term"].lower()}%'
+def keep_areas_intact(page, next_row):
+    # Drop the trailing area when it continues on the next page, unless it is
+    # the only area on this page (then it has to be split anyway).
+    next_area = (next_row.state, next_row.city)
 
-    query_result = (
-        Venue.query.with_entities(
-            Venue.id, Venue.name, func.count(Show.id).label("num_upcoming_shows")
-        )
-        .outerjoin(Show, Show.venue_id == Venue.id)
-        .filter(Venue.name.ilike(search))
-        .group_by(Venue.id, Venue.name, Show.venue_id)
-        .all()
+    end = len(page)
+    while end > 0 and (page[end - 1].state, page[end - 1].city) == next_area:
+        end -= 1
+
+    return page[:end] if end > 0 else page
+
+
+@app.route("/venues/search", methods=["GET", "POST"])
+def search_venues():
+    search_term = request.values.get("search_term", "")
+    response = search_by_name(
+        Venue,
+        search_term,
+        page=request.args.get("page", 1, type=int),
+        per_page=app.config["SEARCH_PAGE_SIZE"],
     )
-    response = {"count": len(query_result), "data": query_result}
 
     return render_template(
         "pages/search_venues.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
 @app.route("/venues/<int:venue_id>")
+@conditional_page(lambda venue_id: detail_version(Venue, Artist, venue_id))
+@cached_page(app.config["PAGE_CACHE_DETAIL_TTL"], lambda venue_id: f"venue:{venue_id}")
 def show_venue(venue_id):
-    venue = Venue.query.get_or_404(venue_id)
+    data = load_detail(
+        Venue,
+        Show.venue_id,
+        Artist,
+        Show.artist_id,
+        venue_id,
+        datetime.now(timezone.utc),
+        app.config["PAST_SHOWS_PAGE_SIZE"],
+    )
+    if data is None:
+        abort(404)
+    add_cache_tags(
+        *(
+            f"artist:{show['artist_id']}"
+            for show in data["upcoming_shows"] + data["past_shows"]
+        )
+    )
+
+    past_shows_url = (
+        url_for("venue_past_shows", venue_id=venue_id, after=data["past_shows_cursor"])
+        if data["past_shows_cursor"]
+        else None
+    )
 
-    data = venue.__dict__
+    return render_template(
+        "pages/show_venue.html", venue=data, past_shows_url=past_shows_url
+    )
 
-    print(data['website_link'])
 
-    shows = group_by(
-        venue.shows,
-        lambda item: item.start_time < datetime.today().astimezone(),
-        lambda item: {
-            "start_time": item.start_time,
-            "artist_id": item.artist_id,
-            "artist_name": item.artist.name,
-            "artist_image_link": item.artist.image_link,
-        },
+@app.route("/venues/<int:venue_id>/past-shows")
+@cached_page(app.config["PAGE_CACHE_DETAIL_TTL"], lambda venue_id: f"venue:{venue_id}")
+def venue_past_shows(venue_id):
+    shows, next_cursor = load_past_shows(
+        Show.venue_id,
+        Artist,
+        Show.artist_id,
+        venue_id,
+        datetime.now(timezone.utc),
+        request.args.get("after"),
+        app.config["PAST_SHOWS_PAGE_SIZE"],
+    )
+    add_cache_tags(*(f"artist:{show['artist_id']}" for show in shows))
+    next_url = (
+        url_for("venue_past_shows", venue_id=venue_id, after=next_cursor)
+        if next_cursor
+        else None
+    )
+
+    return render_template(
+        "pages/_past_shows.html", shows=shows, other="artist", next_url=next_url
+    )
+
+
+def month_window():
+    """Return the [start, end) UTC window of the ?month=YYYY-MM argument,
+    defaulting to the current month."""
+    try:
+        month = datetime.strptime(request.args["month"], "%Y-%m")
+    except (KeyError, ValueError):
+        month = datetime.now(timezone.utc)
+
+    # The calendar grid and previous/next links reach into adjacent years.
+    if not datetime.min.year < month.year < datetime.max.year:
+        month = datetime.now(timezone.utc)
+
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end = datetime(
+        month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc
+    )
+    return start, end
+
+
+def render_calendar(kind, data, start, end):
+    shows_by_day = group_by(
+        data["shows"],
+        lambda show: show["start_time"].astimezone(timezone.utc).date(),
+    )
+
+    return render_template(
+        "pages/calendar.html",
+        kind=kind,
+        other="artist" if kind == "venue" else "venue",
+        entity=data,
+        month=start,
+        weeks=calendar.Calendar(firstweekday=6).monthdatescalendar(
+            start.year, start.month
+        ),
+        shows_by_day=shows_by_day,
+        previous_month=(start - timedelta(days=1)).strftime("%Y-%m"),
+        next_month=end.strftime("%Y-%m"),
     )
 
-    data["past_shows"] = shows.get(True, [])
-    data["past_shows_count"] = len(data["past_shows"])
 
-    data["upcoming_shows"] = shows.get(False, [])
-    data["upcoming_shows_count"] = len(data["upcoming_shows"])
+@app.route("/venues/<int:venue_id>/calendar")
+@cached_page(app.config["PAGE_CACHE_DETAIL_TTL"], lambda venue_id: f"venue:{venue_id}")
+def venue_calendar(venue_id):
+    start, end = month_window()
+    data = load_month(
+        Venue, Show.venue_id, Artist, Show.artist_id, venue_id, start, end
+    )
+    if data is None:
+        abort(404)
+    add_cache_tags(*(f"artist:{show['artist_id']}" for show in data["shows"]))
 
-    return render_template("pages/show_venue.html", venue=data)
+    return render_calendar("venue", data, start, end)
 
 
 #  Create Venue
@@ -154,16 +365,18 @@ def create_venue_submission():
             venue_form.populate_obj(new_venue)
             db.session.add(new_venue)
             db.session.commit()
+            venue_written(new_venue)
 
             flash("Venue " + request.form["name"] + " was successfully listed!")
 
             return redirect("/venues")
 
-    except SQLAlchemyError:
+    except SQLAlchemyError as error:
         db.session.rollback()
 
         flash(
-            "Failed to create venue with name: "
+            duplicate_message(error)
+            or "Failed to create venue with name: "
             + request.form["name"]
             + ". Please contact page admin!"
         )
@@ -174,9 +387,12 @@ def create_venue_submission():
 @app.route("/venues/<venue_id>", methods=["DELETE"])
 def delete_venue(venue_id):
     try:
-        venue = Venue.query.get_or_404(venue_id)
+        venue = Venue.query.options(*loader_profile(Venue, "delete")).get_or_404(
+            venue_id
+        )
         db.session.delete(venue)
         db.session.commit()
+        venue_deleted(venue)
     except SQLAlchemyError:
         db.session.rollback()
 
@@ -186,56 +402,158 @@ def delete_venue(venue_id):
 #  Artists
 #  ----------------------------------------------------------------
 @app.route("/artists")
+@conditional_page(lambda: table_version(Artist))
+@cached_page(app.config["PAGE_CACHE_LIST_TTL"], "artists:list")
 def artists():
     data = Artist.query.with_entities(Artist.id, Artist.name).all()
 
     return render_template("pages/artists.html", artists=data)
 
 
-@app.route("/artists/search", methods=["POST"])
+@app.route("/artists/search", methods=["GET", "POST"])
 def search_artists():
-    search = f'%{request.form["search_term"].lower()}%'
-
-    query_result = (
-        Artist.query.with_entities(
-            Artist.id, Artist.name, func.count(Show.id).label("num_upcoming_shows")
-        )
-        .join(Show, Show.venue_id == Artist.id)
-        .filter(Artist.name.ilike(search))
-        .group_by(Artist.id, Artist.name, Show.venue_id)
-        .all()
+    search_term = request.values.get("search_term", "")
+    response = search_by_name(
+        Artist,
+        search_term,
+        page=request.args.get("page", 1, type=int),
+        per_page=app.config["SEARCH_PAGE_SIZE"],
     )
-    response = {"count": len(query_result), "data": query_result}
+
     return render_template(
         "pages/search_artists.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
 @app.route("/artists/<int:artist_id>")
+@conditional_page(lambda artist_id: detail_version(Artist, Venue, artist_id))
+@cached_page(
+    app.config["PAGE_CACHE_DETAIL_TTL"], lambda artist_id: f"artist:{artist_id}"
+)
 def show_artist(artist_id):
-    artist = Artist.query.get_or_404(artist_id)
-    data = artist.__dict__
+    data = load_detail(
+        Artist,
+        Show.artist_id,
+        Venue,
+        Show.venue_id,
+        artist_id,
+        datetime.now(timezone.utc),
+        app.config["PAST_SHOWS_PAGE_SIZE"],
+    )
+    if data is None:
+        abort(404)
+    add_cache_tags(
+        *(
+            f"venue:{show['venue_id']}"
+            for show in data["upcoming_shows"] + data["past_shows"]
+        )
+    )
 
-    shows = group_by(
-        artist.shows,
-        lambda item: item.start_time < datetime.today().astimezone(),
-        lambda item: {
-            "start_time": item.start_time,
-            "venue_id": item.venue_id,
-            "venue_image_link": item.venue.image_link,
-            "venue_name": item.venue.name,
-        },
+    past_shows_url = (
+        url_for(
+            "artist_past_shows", artist_id=artist_id, after=data["past_shows_cursor"]
+        )
+        if data["past_shows_cursor"]
+        else None
+    )
+
+    return render_template(
+        "pages/show_artist.html", artist=data, past_shows_url=past_shows_url
+    )
+
+
+@app.route("/artists/<int:artist_id>/past-shows")
+@cached_page(
+    app.config["PAGE_CACHE_DETAIL_TTL"], lambda artist_id: f"artist:{artist_id}"
+)
+def artist_past_shows(artist_id):
+    shows, next_cursor = load_past_shows(
+        Show.artist_id,
+        Venue,
+        Show.venue_id,
+        artist_id,
+        datetime.now(timezone.utc),
+        request.args.get("after"),
+        app.config["PAST_SHOWS_PAGE_SIZE"],
+    )
+    add_cache_tags(*(f"venue:{show['venue_id']}" for show in shows))
+    next_url = (
+        url_for("artist_past_shows", artist_id=artist_id, after=next_cursor)
+        if next_cursor
+        else None
+    )
+
+    return render_template(
+        "pages/_past_shows.html", shows=shows, other="venue", next_url=next_url
+    )
+
+
+@app.route("/artists/<int:artist_id>/calendar")
+@cached_page(
+    app.config["PAGE_CACHE_DETAIL_TTL"], lambda artist_id: f"artist:{artist_id}"
+)
+def artist_calendar(artist_id):
+    start, end = month_window()
+    data = load_month(
+        Artist, Show.artist_id, Venue, Show.venue_id, artist_id, start, end
+    )
+    if data is None:
+        abort(404)
+    add_cache_tags(*(f"venue:{show['venue_id']}" for show in data["shows"]))
+
+    return render_calendar("artist", data, start, end)
+
+
+#  Search
+#  ----------------------------------------------------------------
+
+
+@app.route("/search")
+def search():
+    search_term = request.args.get("q", "")
+    results = search_all(
+        db.session, search_term, per_type=app.config["SEARCH_RESULTS_PER_TYPE"]
+    )
+
+    return render_template(
+        "pages/search.html", results=results, search_term=search_term
+    )
+
+
+#  Suggestions
+#  ----------------------------------------------------------------
+
+
+def suggest_entries():
+    return chain(
+        (
+            ("venue", row.id, row.name)
+            for row in Venue.query.with_entities(Venue.id, Venue.name)
+        ),
+        (
+            ("artist", row.id, row.name)
+            for row in Artist.query.with_entities(Artist.id, Artist.name)
+        ),
     )
 
-    data["past_shows"] = shows.get(True, [])
-    data["past_shows_count"] = len(data["past_shows"])
 
-    data["upcoming_shows"] = shows.get(False, [])
-    data["upcoming_shows_count"] = len(data["upcoming_shows"])
+@app.route("/api/suggest")
+def suggest():
+    # Rebuilt per worker every SUGGEST_INDEX_TTL seconds so writes made by
+    # other workers show up; this worker's own writes apply immediately.
+    suggest_index.refresh(suggest_entries)
 
-    return render_template("pages/show_artist.html", artist=data)
+    suggestions = suggest_index.suggest(
+        request.args.get("q", ""),
+        kind=request.args.get("type"),
+        limit=min(request.args.get("limit", 10, type=int), 50),
+    )
+    for item in suggestions:
+        item["url"] = f"/{item['type']}s/{item['id']}"
+
+    return jsonify(suggestions)
 
 
 #  Update
@@ -243,7 +561,7 @@ def show_artist(artist_id):
 @app.route("/artists/<int:artist_id>/edit", methods=["GET"])
 def edit_artist(artist_id):
     form = ArtistForm()
-    artist = Artist.query.options(noload(Artist.shows)).get_or_404(artist_id)
+    artist = Artist.query.get_or_404(artist_id)
     # TODO: populate form with fields from artist with ID <artist_id>
 
     form.name.data = artist.name
@@ -264,17 +582,19 @@ def edit_artist_submission(artist_id):
         artist_form = ArtistForm(request.form, meta={"csrf": False})
 
         if artist_form.validate():
-            editting_artist = Artist.query.options(noload(Artist.shows)).get_or_404(
-                artist_id
-            )
+            editting_artist = Artist.query.get_or_404(artist_id)
 
             artist_form.populate_obj(editting_artist)
 
             db.session.commit()
+            artist_written(editting_artist)
 
             return redirect("/artists")
-    except SQLAlchemyError:
+    except SQLAlchemyError as error:
         db.session.rollback()
+        message = duplicate_message(error)
+        if message:
+            flash(message)
 
     return render_template(
         "forms/edit_artist.html", form=artist_form, artist=editting_artist
@@ -285,7 +605,7 @@ def edit_artist_submission(artist_id):
 def edit_venue(venue_id):
     form = VenueForm()
 
-    venue = Venue.query.options(noload(Venue.shows)).get_or_404(venue_id)
+    venue = Venue.query.get_or_404(venue_id)
 
     form.name.data = venue.name
     form.city.data = venue.city
@@ -308,18 +628,21 @@ def edit_venue_submission(venue_id):
         venue_form = VenueForm(request.form, meta={"csrf": False})
 
         if venue_form.validate():
-            editting_venue = Venue.query.options(noload(Venue.shows)).get_or_404(
-                venue_id
-            )
+            editting_venue = Venue.query.get_or_404(venue_id)
 
+            previous_area = (editting_venue.state, editting_venue.city)
             venue_form.populate_obj(editting_venue)
 
             db.session.commit()
+            venue_written(editting_venue, previous_area)
             flash("Update venue successfully!")
 
             return redirect("/venues")
-    except SQLAlchemyError:
+    except SQLAlchemyError as error:
         db.session.rollback()
+        message = duplicate_message(error)
+        if message:
+            flash(message)
 
     return render_template(
         "forms/edit_venue.html", form=venue_form, venue=editting_venue
@@ -346,14 +669,16 @@ def create_artist_submission():
             artist_form.populate_obj(new_artist)
             db.session.add(new_artist)
             db.session.commit()
+            artist_written(new_artist)
 
             flash("Artist " + request.form["name"] + " was successfully listed!")
             return redirect("/artists")
 
-    except SQLAlchemyError:
+    except SQLAlchemyError as error:
         db.session.rollback()
         flash(
-            "Failed to create artist with name = "
+            duplicate_message(error)
+            or "Failed to create artist with name = "
             + request.form["name"]
             + ". Please contact admin!"
         )
@@ -365,10 +690,42 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 
+def datetime_arg(name, end_of_day=False):
+    """Parse an ISO date or datetime query argument, taking naive values as
+    UTC. With ``end_of_day``, a plain date means the start of the next day,
+    so an exclusive upper bound still includes that date. Returns None when
+    missing or malformed."""
+    try:
+        value = datetime.fromisoformat(request.args[name])
+    except (KeyError, ValueError):
+        return None
+
+    if end_of_day and len(request.args[name]) == len("YYYY-MM-DD"):
+        try:
+            value += timedelta(days=1)
+        except OverflowError:
+            # The last representable date: nothing is later.
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Query arguments carried over to the next /shows page.
+SHOW_FILTERS = ("from", "to", "city", "state")
+
+
 @app.route("/shows")
+@conditional_page(shows_version)
+@cached_page(app.config["PAGE_CACHE_LIST_TTL"], "shows:list")
 def shows():
-    data = (
+    page_size = app.config["SHOWS_PAGE_SIZE"]
+    start = datetime_arg("from") or datetime.now(timezone.utc)
+    end = datetime_arg("to", end_of_day=True)
+    city = request.args.get("city", "").strip()
+    state = request.args.get("state", "").strip()
+
+    query = (
         Show.query.with_entities(
+            Show.id,
             Show.venue_id,
             Venue.name.label("venue_name"),
             Show.artist_id,
@@ -378,18 +735,58 @@ def shows():
         )
         .outerjoin(Venue, Venue.id == Show.venue_id)
         .outerjoin(Artist, Artist.id == Show.artist_id)
-        .order_by(Show.start_time)
-        .all()
+        .filter(Show.start_time >= start)
+    )
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    if city:
+        query = query.filter(func.lower(Venue.city) == city.lower())
+    if state:
+        query = query.filter(Venue.state == state)
+
+    cursor = decode_time_cursor(request.args.get("after"))
+    if cursor is not None:
+        query = query.filter(after_cursor((Show.start_time, Show.id), cursor))
+
+    data = query.order_by(Show.start_time, Show.id).limit(page_size + 1).all()
+
+    next_url = None
+    if len(data) > page_size:
+        data = data[:page_size]
+        next_url = url_for(
+            "shows",
+            **{key: request.args[key] for key in SHOW_FILTERS if key in request.args},
+            after=encode_cursor((data[-1].start_time, data[-1].id)),
+        )
+
+    return render_template(
+        "pages/shows.html",
+        shows=data,
+        filters={
+            "from": request.args.get("from", ""),
+            "to": request.args.get("to", ""),
+            "city": city,
+            "state": state,
+        },
+        states=States,
+        next_url=next_url,
     )
 
-    return render_template("pages/shows.html", shows=data)
+
+def build_show_form(formdata=None, **kwargs):
+    return ShowForm(
+        formdata,
+        artist_choices=artist_choices.choices(),
+        venue_choices=venue_choices.choices(),
+        artist_exists=artist_choices.exists,
+        venue_exists=venue_choices.exists,
+        **kwargs,
+    )
 
 
 @app.route("/shows/create")
 def create_shows():
-    artists = Artist.query.all()
-    venues = Venue.query.all()
-    form = ShowForm(venues=venues, artists=artists)
+    form = build_show_form()
 
     return render_template("forms/new_show.html", form=form)
 
@@ -397,17 +794,14 @@ def create_shows():
 @app.route("/shows/create", methods=["POST"])
 def create_show_submission():
     try:
-        artists = Artist.query.all()
-        venues = Venue.query.all()
-        show_form = ShowForm(
-            request.form, meta={"csrf": False}, venues=venues, artists=artists
-        )
+        show_form = build_show_form(request.form, meta={"csrf": False})
 
         if show_form.validate():
             new_show = Show()
             show_form.populate_obj(new_show)
             db.session.add(new_show)
             db.session.commit()
+            show_written(new_show)
 
             flash("Show was successfully listed!")
             return redirect("/shows")
@@ -417,7 +811,157 @@ def create_show_submission():
 
         flash("Failed to create show")
 
-    return render_template("pages/new_show.html", form=show_form)
+    return render_template("forms/new_show.html", form=show_form)
+
+
+#  Export
+#  ----------------------------------------------------------------
+
+
+@app.route("/export/<any(venues, artists, shows):entity>.<any(csv, jsonl):fmt>")
+@admin_required
+def export(entity, fmt):
+    # Full-table dumps hold a connection and a server-side cursor for the
+    # whole stream, so only admins (e.g. the nightly analytics job) get them.
+    compress = request.args.get("gzip") == "1"
+    filename = f"{entity}.{fmt}.gz" if compress else f"{entity}.{fmt}"
+
+    chunks = export_rows(entity, fmt, app.config["EXPORT_BATCH_SIZE"], compress)
+    response = Response(
+        stream_with_context(chunks),
+        mimetype="application/gzip" if compress else FORMATS[fmt],
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+
+@app.cli.command("rollover-shows")
+def rollover_shows_command():
+    """Move shows that have started from the upcoming to the past counters.
+
+    Run periodically, e.g. from cron every few minutes."""
+    moved = rollover_shows()
+    db.session.commit()
+    click.echo(f"Rolled over {moved} shows.")
+
+
+@app.cli.command("recount-shows")
+def recount_shows_command():
+    """Rebuild the upcoming/past show counters from the Show table."""
+    recount_shows()
+    db.session.commit()
+    click.echo("Show counters rebuilt.")
+
+
+@app.cli.command("import")
+@click.argument("kind", type=click.Choice(sorted(IMPORTERS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=1000, show_default=True)
+@click.option("--workers", type=int, help="Validation processes [default: CPUs]")
+def import_command(kind, path, batch_size, workers):
+    """Bulk-import venues, artists or shows from a CSV or JSONL file.
+
+    Rows are validated like the web forms and upserted on their natural
+    key, so re-running an import is safe."""
+
+    def report_rejected(line_number, errors):
+        click.echo(f"line {line_number}: {errors}", err=True)
+
+    processed, imported, rejected, seconds = import_file(
+        kind, path, batch_size, workers, on_rejected=report_rejected
+    )
+    if kind == "show":
+        # The bulk insert bypasses the per-show counter hooks.
+        recount_shows()
+        db.session.commit()
+
+    # Valid rows not written repeat a natural key, or are existing shows.
+    skipped = processed - imported - rejected
+    click.echo(
+        f"Processed {processed} {kind} rows: {imported} imported, {skipped}"
+        f" skipped as duplicates, {rejected} rejected, in {seconds:.1f}s"
+        f" ({processed / max(seconds, 1e-9):.0f} rows/s)."
+    )
+
+
+@app.cli.command("export")
+@click.argument("entity", type=click.Choice(sorted(EXPORTS)))
+@click.argument("fmt", type=click.Choice(sorted(FORMATS)))
+@click.option("-o", "--output", default="-", help="File to write [default: stdout]")
+@click.option("--gzip", "compress", is_flag=True, help="Compress the output.")
+def export_command(entity, fmt, output, compress):
+    """Stream the venue, artist or show table as CSV or JSONL."""
+    batch_size = app.config["EXPORT_BATCH_SIZE"]
+    with click.open_file(output, "wb") as file:
+        for chunk in export_rows(entity, fmt, batch_size, compress):
+            file.write(chunk)
+
+
+@app.cli.command("explain-routes")
+@click.option(
+    "--estimate-ratio",
+    default=10.0,
+    show_default=True,
+    help="Flag plan nodes whose row estimate is off by this factor.",
+)
+@click.option("--verbose", is_flag=True, help="Print every statement.")
+def explain_routes_command(estimate_ratio, verbose):
+    """EXPLAIN ANALYZE the SQL of every GET route against the configured
+    database and report seq scans, missing indexes and bad estimates."""
+    missing = set()
+
+    for endpoint, url, status, results in audit_routes(app, estimate_ratio):
+        total_ms = sum(plan["Execution Time"] for _, plan, _ in results)
+        click.echo(f"{url} [{status}] {len(results)} queries, {total_ms:.1f}ms")
+
+        for statement, plan, findings in results:
+            if not (findings or verbose):
+                continue
+
+            click.echo(f"  {' '.join(statement.split())[:200]}")
+            for finding in findings:
+                click.echo(f"    {finding.kind}: {finding.message}")
+                if finding.kind == "missing-index":
+                    missing.add((finding.table, finding.column))
+
+    if missing:
+        click.echo("\nSuggested migration:\n")
+        click.echo(index_migration(missing))
+
+
+@app.cli.command("admin-token")
+def admin_token_command():
+    """Print a token granting access to the /admin pages and profiling."""
+    if not app.config["ADMIN_SECRET"]:
+        raise click.ClickException("Set FYYUR_ADMIN_SECRET first.")
+    click.echo(make_admin_token())
+
+
+@app.cli.command("memory-report")
+@click.option("--lines", default=3, show_default=True, help="Top lines per route.")
+def memory_report_command(lines):
+    """Summarize per-route allocations recorded by the workers."""
+    report = merged_report(app.config["MEMTRACK_DIR"])
+    if not report:
+        click.echo("No allocation data; is MEMTRACK_ENABLED set?")
+        return
+
+    click.echo(
+        f"{'endpoint':30} {'requests':>9} {'net KiB':>9} {'peak KiB':>9} {'max KiB':>9}"
+    )
+    for route in report:
+        click.echo(
+            f"{route['endpoint']:30} {route['requests']:9d}"
+            f" {route['net_avg'] / 1024:9.1f} {route['peak_avg'] / 1024:9.1f}"
+            f" {route['peak_max'] / 1024:9.1f}"
+        )
+        for line, size in route["lines"][:lines]:
+            click.echo(f"    {size / 1024:8.1f} KiB  {line}")
 
 
 @app.errorhandler(404)
@@ -431,13 +975,7 @@ def server_error(error):
 
 
 if not app.debug:
-    file_handler = FileHandler("error.log")
-    file_handler.setFormatter(
-        Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
+    configure_logging(app)
     app.logger.info("errors")
 
 # ----------------------------------------------------------------------------#
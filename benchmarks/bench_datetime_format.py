@@ -0,0 +1,75 @@
+"""Per-call cost of the Jinja ``datetime`` filter on a 10k-show page.
+
+Compares the previous implementation (babel.dates.format_datetime with a
+pattern string and locale name on every call) against formatting.py, for
+both all-distinct and repeating show times.
+
+    python benchmarks/bench_datetime_format.py --shows 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import babel.dates
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import formatting  # noqa: E402
+
+
+def legacy_format_datetime(value, format="medium"):
+    if format == "full":
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == "medium":
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(value, format, locale="en")
+
+
+def show_times(count, distinct):
+    start = datetime(2024, 1, 1, 20, tzinfo=timezone.utc)
+    return [start + timedelta(hours=index % distinct) for index in range(count)]
+
+
+def measure(label, func, values):
+    formatting._format.cache_clear()
+    start = time.perf_counter()
+    func(values)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<34} {elapsed * 1000:>9.1f} ms {elapsed / len(values) * 1e6:>8.2f} us/call"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=10000)
+    args = parser.parse_args()
+
+    for distinct in (args.shows, 100):
+        values = show_times(args.shows, distinct)
+        print(f"{args.shows} shows, {distinct} distinct start times")
+        measure(
+            "legacy filter",
+            lambda values: [legacy_format_datetime(value, "full") for value in values],
+            values,
+        )
+        measure(
+            "formatting.format_datetime",
+            lambda values: [
+                formatting.format_datetime(value, "full") for value in values
+            ],
+            values,
+        )
+        measure(
+            "formatting.format_many",
+            lambda values: formatting.format_many(values, "full"),
+            values,
+        )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark helper.py grouping against the previous implementation.
+
+Rows look like the /venues query result: (id, state, city, name) tuples
+grouped by (city, state), at 10^3 to 10^6 rows, both sorted by area (as
+the query returns them) and shuffled.
+
+    python benchmarks/bench_grouping.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from itertools import groupby
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import helper  # noqa: E402
+
+Row = namedtuple("Row", "id state city name")
+
+
+def legacy_group_by(iterable, key_selector, value_selector=None):
+    result = dict()
+
+    for key, values in groupby(iterable, key_selector):
+        mapped_values = (
+            values if value_selector is None else map(value_selector, values)
+        )
+        if key in result:
+            result[key].append(mapped_values)
+        else:
+            result[key] = list(mapped_values)
+
+    return result
+
+
+def legacy_group_by_multiple_key(
+    iterable, key_selector, value_selector, keys_field_names, value_field_name
+):
+    result = []
+
+    for key, original_values in legacy_group_by(iterable, key_selector).items():
+        result_item = helper.map_field_names(key, keys_field_names)
+        result_item[value_field_name] = list(map(value_selector, original_values))
+        result.append(result_item)
+
+    return result
+
+
+def make_rows(count, areas):
+    rows = [
+        Row(index, f"S{index % areas % 50}", f"City {index % areas}", f"Venue {index}")
+        for index in range(count)
+    ]
+    rows.sort(key=lambda row: (row.state, row.city, row.id))
+    return rows
+
+
+def area_key(row):
+    return (row.city, row.state)
+
+
+def venue_card(row):
+    return {"id": row.id, "name": row.name}
+
+
+IMPLEMENTATIONS = {
+    "legacy": lambda rows, presorted: legacy_group_by_multiple_key(
+        rows, area_key, venue_card, ["city", "state"], "venues"
+    ),
+    "hash": lambda rows, presorted: helper.group_by_multiple_key(
+        rows, area_key, venue_card, ["city", "state"], "venues"
+    ),
+    "presorted": lambda rows, presorted: (
+        helper.group_by_multiple_key(
+            rows, area_key, venue_card, ["city", "state"], "venues", presorted=True
+        )
+        if presorted
+        else None
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--areas", type=int, default=500)
+    parser.add_argument("--max-exponent", type=int, default=6)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>9} {'order':<9} {'impl':<10} {'ms':>9} {'groups':>7} {'correct':>8}"
+    )
+    for exponent in range(3, args.max_exponent + 1):
+        sorted_rows = make_rows(10**exponent, args.areas)
+        shuffled_rows = random.sample(sorted_rows, len(sorted_rows))
+        expected_groups = len({area_key(row) for row in sorted_rows})
+
+        for order, rows in (("sorted", sorted_rows), ("shuffled", shuffled_rows)):
+            for name, implementation in IMPLEMENTATIONS.items():
+                start = time.perf_counter()
+                try:
+                    result = implementation(rows, order == "sorted")
+                except AttributeError:
+                    # The legacy helper appends a lazy map object to a group
+                    # whose key reappears, which fails on the second pass.
+                    print(
+                        f"{len(rows):>9} {order:<9} {name:<10} {'-':>9} {'-':>7} {'crash':>8}"
+                    )
+                    continue
+                elapsed = time.perf_counter() - start
+                if result is None:
+                    continue
+
+                correct = len(result) == expected_groups and sum(
+                    len(group["venues"]) for group in result
+                ) == len(rows)
+                print(
+                    f"{len(rows):>9} {order:<9} {name:<10} {elapsed * 1000:>9.1f}"
+                    f" {len(result):>7} {str(correct):>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
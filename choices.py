@@ -0,0 +1,61 @@
+import threading
+import time
+
+from sqlalchemy import exists, func, select
+
+from metrics import cache_lookup
+from models import db
+from tracing import span
+
+# ----------------------------------------------------------------------------#
+# Cached (id, name) choices for the ShowForm selects.
+#
+# Each worker keeps its own copy, refreshed after ``ttl`` seconds or when a
+# handler in this process writes to the model. Once the table holds more than
+# ``max_choices`` rows the choices are not loaded at all and the form falls
+# back to an id input with typeahead.
+# ----------------------------------------------------------------------------#
+
+
+class ChoiceProvider:
+    def __init__(self, model, ttl=300, max_choices=500):
+        self.model = model
+        self.ttl = ttl
+        self.max_choices = max_choices
+        self._choices = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def choices(self):
+        """Return the (id, name) pairs ordered by name, or None when there
+        are too many to render as a select."""
+        with self._lock, span("cache.lookup", cache="choices") as lookup:
+            expired = time.monotonic() >= self._expires_at
+            lookup.set("hit", not expired)
+            cache_lookup("choices", not expired)
+            if expired:
+                self._choices = self._load()
+                self._expires_at = time.monotonic() + self.ttl
+
+            return self._choices
+
+    def _load(self):
+        count = db.session.scalar(select(func.count()).select_from(self.model))
+        if count > self.max_choices:
+            return None
+
+        return [
+            tuple(row)
+            for row in db.session.execute(
+                select(self.model.id, self.model.name).order_by(
+                    self.model.name, self.model.id
+                )
+            )
+        ]
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0
+
+    def exists(self, entity_id):
+        return db.session.scalar(select(exists().where(self.model.id == entity_id)))
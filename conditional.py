@@ -0,0 +1,125 @@
+import hashlib
+from functools import wraps
+
+from flask import g, request, session, make_response
+from sqlalchemy import select
+
+from models import db, Venue, Artist, Show, Revision
+
+# ----------------------------------------------------------------------------#
+# Conditional GET.
+#
+# Each page is described by a cheap version lookup returning a tuple of
+# values that change whenever the rendered page would, plus the page's
+# last modification time. Lookups only read primary keys: the entity row's
+# own version and the per-table counters in Revision, which every write
+# bumps (see models.py and counters.py). Matching If-None-Match /
+# If-Modified-Since headers are answered with a 304 before the view runs.
+# ----------------------------------------------------------------------------#
+
+
+def _latest(*times):
+    return max(filter(None, times), default=None)
+
+
+def detail_version(owner, other, owner_id):
+    """Version of a venue or artist page: the row's own version, which the
+    show counter hooks bump when its shows are added, removed or roll over
+    into the past, and the revision of the table on the far side of those
+    shows, whose names the page lists."""
+    row = db.session.execute(
+        select(owner.version, owner.updated_at, Revision.value, Revision.updated_at)
+        .outerjoin(Revision, Revision.name == other.__tablename__)
+        .where(owner.id == owner_id)
+    ).first()
+
+    if row is None:
+        return None
+
+    version, updated_at, revision, revised_at = row
+    return (version, revision), _latest(updated_at, revised_at)
+
+
+def table_version(*models):
+    """Version of a listing over ``models``: the revision of each table."""
+    names = [model.__tablename__ for model in models]
+    revisions = {
+        name: (value, updated_at)
+        for name, value, updated_at in db.session.execute(
+            select(Revision.name, Revision.value, Revision.updated_at).where(
+                Revision.name.in_(names)
+            )
+        )
+    }
+
+    values = tuple(revisions.get(name, (0, None))[0] for name in names)
+    return values, _latest(*(updated_at for _, updated_at in revisions.values()))
+
+
+def _etag(values):
+    source = repr((request.full_path, values)).encode()
+    return hashlib.sha1(source).hexdigest()
+
+
+def _matching_etag(etag, last_modified):
+    """Return the ETag the client already holds if the page is unchanged."""
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    if request.if_none_match:
+        for candidate in (etag, f"{etag}-gzip"):
+            if request.if_none_match.contains(candidate):
+                return candidate
+        return None
+
+    if request.if_modified_since and last_modified is not None:
+        if last_modified.replace(microsecond=0) <= request.if_modified_since:
+            return etag
+
+    return None
+
+
+def conditional_page(page_version):
+    """Answer conditional GETs for a view. ``page_version`` receives the view
+    arguments and returns (values, last_modified), or None to skip."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # A pending flash message must be rendered, not revalidated, and
+            # a profiled request must run the view.
+            skip = "_flashes" in session or "profile" in g
+            version = None if skip else page_version(**kwargs)
+            if version is None:
+                return view(**kwargs)
+
+            values, last_modified = version
+            etag = _etag(values)
+            # cached_page only serves a body rendered at this version.
+            g.page_version = values
+
+            matching_etag = _matching_etag(etag, last_modified)
+            if matching_etag is not None:
+                response = make_response("", 304)
+                etag = matching_etag
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+
+                # Each content coding is a different representation.
+                if response.headers.get("Content-Encoding") == "gzip":
+                    etag = f"{etag}-gzip"
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def shows_version():
+    """Version of a /shows page. Besides edits, the listing changes whenever
+    a show starts; ``rollover_shows`` bumps the Show revision then."""
+    return table_version(Show, Venue, Artist)
@@ -0,0 +1,138 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, Venue, Artist, Show, bump_revision
+
+# ----------------------------------------------------------------------------#
+# Denormalized upcoming/past show counters on Venue and Artist.
+#
+# Each Show is counted exactly once, as upcoming or as past, according to its
+# ``counted_as_past`` flag. The flag is set when the show is inserted and is
+# flipped by ``rollover_shows`` once ``start_time`` has passed.
+# ----------------------------------------------------------------------------#
+
+venue_table = Venue.__table__
+artist_table = Artist.__table__
+show_table = Show.__table__
+
+
+def _touched(table):
+    # Show changes alter the owning venue/artist page, so they count as a
+    # revision of that row.
+    return {"version": table.c.version + 1, "updated_at": func.now()}
+
+
+def _adjust(connection, table, entity_id, upcoming=0, past=0):
+    if entity_id is None:
+        return
+
+    bump_revision(connection, table.name)
+    connection.execute(
+        update(table)
+        .where(table.c.id == entity_id)
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count + upcoming,
+            past_shows_count=table.c.past_shows_count + past,
+            **_touched(table),
+        )
+    )
+
+
+@event.listens_for(Show, "after_insert")
+def count_new_show(mapper, connection, show):
+    # Compare in SQL so naive form input is interpreted the same way as when
+    # it was stored in the timestamptz column.
+    is_past = connection.execute(
+        update(show_table)
+        .where(show_table.c.id == show.id)
+        .values(counted_as_past=show_table.c.start_time < func.now())
+        .returning(show_table.c.counted_as_past)
+    ).scalar()
+    set_committed_value(show, "counted_as_past", is_past)
+
+    upcoming, past = (0, 1) if is_past else (1, 0)
+    _adjust(connection, venue_table, show.venue_id, upcoming, past)
+    _adjust(connection, artist_table, show.artist_id, upcoming, past)
+
+
+@event.listens_for(Show, "after_delete")
+def uncount_deleted_show(mapper, connection, show):
+    upcoming, past = (0, -1) if show.counted_as_past else (-1, 0)
+    _adjust(connection, venue_table, show.venue_id, upcoming, past)
+    _adjust(connection, artist_table, show.artist_id, upcoming, past)
+
+
+def _move_to_past(table, moved):
+    params = [
+        {"entity_id": entity_id, "moved": count}
+        for entity_id, count in moved.items()
+        if entity_id is not None
+    ]
+    if not params:
+        return
+
+    bump_revision(db.session.connection(), table.name)
+    db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam("entity_id"))
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count - bindparam("moved"),
+            past_shows_count=table.c.past_shows_count + bindparam("moved"),
+            **_touched(table),
+        ),
+        params,
+    )
+
+
+def rollover_shows(now=None):
+    """Move every show whose start time has passed from the upcoming to the
+    past counters. Returns the number of shows moved; the caller commits."""
+    now = now or datetime.now(timezone.utc)
+
+    moved_shows = db.session.execute(
+        update(show_table)
+        .where(show_table.c.counted_as_past.is_(False), show_table.c.start_time < now)
+        .values(counted_as_past=True)
+        .returning(show_table.c.venue_id, show_table.c.artist_id)
+    ).all()
+    if moved_shows:
+        # Started shows drop off /shows (see conditional.shows_version).
+        bump_revision(db.session.connection(), show_table.name)
+
+    _move_to_past(venue_table, Counter(show.venue_id for show in moved_shows))
+    _move_to_past(artist_table, Counter(show.artist_id for show in moved_shows))
+
+    return len(moved_shows)
+
+
+def recount_shows():
+    """Rebuild all counters from the Show table, e.g. after a migration or a
+    bulk load that bypassed the ORM hooks. The caller commits."""
+    db.session.execute(
+        update(show_table).values(counted_as_past=show_table.c.start_time < func.now())
+    )
+
+    for table, foreign_key in (
+        (venue_table, show_table.c.venue_id),
+        (artist_table, show_table.c.artist_id),
+    ):
+        bump_revision(db.session.connection(), table.name)
+        db.session.execute(
+            update(table).values(
+                upcoming_shows_count=_count_shows(table, foreign_key, False),
+                past_shows_count=_count_shows(table, foreign_key, True),
+                **_touched(table),
+            )
+        )
+
+
+def _count_shows(table, foreign_key, is_past):
+    return (
+        select(func.count())
+        .where(foreign_key == table.c.id)
+        .where(show_table.c.counted_as_past.is_(is_past))
+        .scalar_subquery()
+    )
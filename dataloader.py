@@ -0,0 +1,73 @@
+from flask import g
+
+# ----------------------------------------------------------------------------#
+# Per-request batched lookups by id.
+#
+# ``load`` only queues an id and returns a handle; the first handle that is
+# read fetches every queued id of that loader with one ``IN (...)`` query.
+# Results are kept for the rest of the request, so asking for the same id
+# twice does not query again.
+# ----------------------------------------------------------------------------#
+
+
+class Deferred:
+    __slots__ = ("loader", "key")
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+
+    def get(self):
+        return self.loader.get(self.key)
+
+
+class DataLoader:
+    def __init__(self, batch_fn):
+        # ``batch_fn`` receives a list of keys and returns {key: value}.
+        self.batch_fn = batch_fn
+        self._values = {}
+        self._queue = []
+
+    def load(self, key):
+        if key is not None and key not in self._values:
+            self._queue.append(key)
+        return Deferred(self, key)
+
+    def load_many(self, keys):
+        deferred = [self.load(key) for key in keys]
+        return [item.get() for item in deferred]
+
+    def get(self, key):
+        if key is not None and key not in self._values:
+            self._queue.append(key)
+            self._dispatch()
+        return self._values.get(key)
+
+    def _dispatch(self):
+        keys = list(
+            dict.fromkeys(key for key in self._queue if key not in self._values)
+        )
+        self._queue = []
+        if not keys:
+            return
+
+        found = self.batch_fn(keys)
+        for key in keys:
+            self._values[key] = found.get(key)
+
+
+def by_id_loader(model, columns):
+    """The request's loader of ``model`` rows with ``columns`` by id."""
+    loaders = g.setdefault("loaders", {})
+    key = (model, tuple(column.key for column in columns))
+
+    loader = loaders.get(key)
+    if loader is None:
+
+        def batch_fn(ids):
+            rows = model.query.with_entities(*columns).filter(model.id.in_(ids))
+            return {row.id: row for row in rows}
+
+        loader = loaders[key] = DataLoader(batch_fn)
+
+    return loader
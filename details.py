@@ -0,0 +1,151 @@
+from sqlalchemy import func, or_, select, true
+
+from formatting import format_many
+from models import db, Show
+from pagination import encode_cursor, decode_time_cursor, after_cursor
+
+# ----------------------------------------------------------------------------#
+# Venue and artist detail pages.
+#
+# ``owner`` is the entity the page is about and ``other`` the one on the far
+# side of each show (artist for a venue page, venue for an artist page). Shows
+# are split into past and upcoming in SQL against one request timestamp.
+# ----------------------------------------------------------------------------#
+
+
+def _show_tiles(other_key, rows):
+    rows = list(rows)
+    labels = format_many((row.start_time for row in rows), "full")
+    return [
+        {
+            "show_id": row.show_id,
+            "start_time": row.start_time,
+            "start_time_label": label,
+            f"{other_key}_id": row.other_id,
+            f"{other_key}_name": row.other_name,
+            f"{other_key}_image_link": row.other_image_link,
+        }
+        for row, label in zip(rows, labels)
+    ]
+
+
+def _shows_of(owner_fk, other, other_fk, owner_id):
+    return (
+        select(
+            Show.id.label("show_id"),
+            Show.start_time,
+            other.id.label("other_id"),
+            other.name.label("other_name"),
+            other.image_link.label("other_image_link"),
+        )
+        .join(other, other.id == other_fk)
+        .where(owner_fk == owner_id)
+    )
+
+
+def load_detail(owner, owner_fk, other, other_fk, owner_id, now, past_limit):
+    """Return the page data for ``owner_id`` with all upcoming shows and the
+    ``past_limit`` most recent past shows, or None if it does not exist."""
+    is_past = Show.start_time < now
+
+    shows = (
+        _shows_of(owner_fk, other, other_fk, owner_id)
+        .add_columns(
+            is_past.label("is_past"),
+            func.row_number()
+            .over(
+                partition_by=is_past, order_by=(Show.start_time.desc(), Show.id.desc())
+            )
+            .label("position"),
+            func.count().over(partition_by=is_past).label("partition_total"),
+        )
+        .subquery()
+    )
+
+    owner_columns = owner.__table__.columns
+    rows = db.session.execute(
+        select(*owner_columns, shows)
+        .outerjoin(shows, true())
+        .where(owner.id == owner_id)
+        .where(
+            or_(
+                shows.c.show_id.is_(None),
+                shows.c.is_past.is_(False),
+                shows.c.position <= past_limit,
+            )
+        )
+        .order_by(shows.c.start_time, shows.c.show_id)
+    ).all()
+
+    if not rows:
+        return None
+
+    data = {column.key: getattr(rows[0], column.key) for column in owner_columns}
+    show_rows = [row for row in rows if row.show_id is not None]
+    past = sorted(
+        (row for row in show_rows if row.is_past), key=lambda row: row.position
+    )
+    upcoming = [row for row in show_rows if not row.is_past]
+
+    other_key = other.__tablename__.lower()
+    data["past_shows"] = _show_tiles(other_key, past)
+    data["past_shows_count"] = past[0].partition_total if past else 0
+    data["upcoming_shows"] = _show_tiles(other_key, upcoming)
+    data["upcoming_shows_count"] = upcoming[0].partition_total if upcoming else 0
+    data["past_shows_cursor"] = (
+        encode_cursor((past[-1].start_time, past[-1].show_id))
+        if len(past) < data["past_shows_count"]
+        else None
+    )
+
+    return data
+
+
+def load_past_shows(owner_fk, other, other_fk, owner_id, now, cursor, limit):
+    """Return the next ``limit`` past shows, most recent first, after
+    ``cursor`` and the cursor for the page after that (or None)."""
+    query = _shows_of(owner_fk, other, other_fk, owner_id).where(Show.start_time < now)
+
+    values = decode_time_cursor(cursor)
+    if values is not None:
+        query = query.where(after_cursor((Show.start_time, Show.id), values, True))
+
+    rows = db.session.execute(
+        query.order_by(Show.start_time.desc(), Show.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor((rows[-1].start_time, rows[-1].show_id))
+
+    return _show_tiles(other.__tablename__.lower(), rows), next_cursor
+
+
+def load_month(owner, owner_fk, other, other_fk, owner_id, start, end):
+    """Return the owner's name and its shows in [start, end), or None if it
+    does not exist."""
+    shows = (
+        _shows_of(owner_fk, other, other_fk, owner_id)
+        .where(Show.start_time >= start, Show.start_time < end)
+        .subquery()
+    )
+
+    rows = db.session.execute(
+        select(owner.name.label("owner_name"), shows)
+        .outerjoin(shows, true())
+        .where(owner.id == owner_id)
+        .order_by(shows.c.start_time, shows.c.show_id)
+    ).all()
+
+    if not rows:
+        return None
+
+    return {
+        "id": owner_id,
+        "name": rows[0].owner_name,
+        "shows": _show_tiles(
+            other.__tablename__.lower(),
+            (row for row in rows if row.show_id is not None),
+        ),
+    }
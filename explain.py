@@ -0,0 +1,238 @@
+import json
+import re
+from contextlib import contextmanager
+from itertools import product
+
+from flask import url_for
+from sqlalchemy import event, inspect, select
+from werkzeug.routing.converters import AnyConverter
+
+from models import db, Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Query plan audit.
+#
+# Requests every GET route through the test client against the configured
+# (seeded) database, records the SELECTs each view issues and runs them again
+# under EXPLAIN (ANALYZE, BUFFERS). Plans are checked for sequential scans
+# filtered on unindexed columns and for row estimates far from the actual
+# counts.
+# ----------------------------------------------------------------------------#
+
+# Full-table dumps scan sequentially by design.
+SKIP_ENDPOINTS = {"static", "export"}
+
+# Query strings that make a view run its interesting queries.
+SAMPLE_ARGS = {
+    "search_venues": {"search_term": "a"},
+    "search_artists": {"search_term": "a"},
+    "search": {"q": "a"},
+    "suggest": {"q": "a"},
+}
+
+# Names compared in a plan's Filter, e.g. ``(venue_id = 3)``, once casts
+# such as ``::text`` are removed.
+FILTER_COLUMN = re.compile(r'"?(\w+)"?\)?\s*(?:=|<>|<=|>=|<|>|~~\*?|IS\b)')
+CAST = re.compile(r"::[\w ]+(\[\])?")
+
+
+class Finding:
+    def __init__(self, kind, message, table=None, column=None):
+        self.kind = kind
+        self.message = message
+        self.table = table
+        self.column = column
+
+
+@contextmanager
+def captured_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _samples():
+    def first_id(model):
+        return db.session.scalar(select(model.id).order_by(model.id).limit(1))
+
+    venue_id, artist_id, show_id = (first_id(m) for m in (Venue, Artist, Show))
+    return {
+        "venue_id": venue_id,
+        "artist_id": artist_id,
+        "item_id": {"venues": venue_id, "artists": artist_id, "shows": show_id},
+    }
+
+
+def route_urls(app):
+    """Yield (endpoint, url) for every GET route that can be filled in with
+    sample arguments."""
+    samples = _samples()
+
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if "GET" not in rule.methods or rule.endpoint in SKIP_ENDPOINTS:
+            continue
+
+        choices = {
+            name: sorted(converter.items)
+            for name, converter in rule._converters.items()
+            if isinstance(converter, AnyConverter)
+        }
+        for combination in product(*choices.values()):
+            values = dict(zip(choices, combination))
+            for name in rule.arguments - values.keys():
+                sample = samples.get(name)
+                if isinstance(sample, dict):
+                    sample = sample.get(values.get("kind"))
+                values[name] = sample
+
+            if None in values.values():
+                continue
+
+            with app.test_request_context():
+                url = url_for(
+                    rule.endpoint, **values, **SAMPLE_ARGS.get(rule.endpoint, {})
+                )
+            yield rule.endpoint, url
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            plan = connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+            ).scalar()
+        finally:
+            # ANALYZE runs the statement; never keep its effects.
+            transaction.rollback()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def _index_columns(index, columns):
+    """Table columns that ``index`` can serve a filter on: the leading key
+    of a btree, any key of a GIN index. Expression keys such as
+    ``lower(name)`` cover the columns they reference."""
+    keys = [
+        name or expression
+        for name, expression in zip(
+            index["column_names"],
+            index.get("expressions") or [None] * len(index["column_names"]),
+        )
+    ]
+    if index.get("dialect_options", {}).get("postgresql_using") != "gin":
+        keys = keys[:1]
+
+    return {word for key in keys if key for word in re.findall(r"\w+", key)} & columns
+
+
+def _indexed_columns(engine):
+    """{table: (columns, columns an index or unique constraint serves)}."""
+    inspector = inspect(engine)
+    indexed = {}
+    for table in inspector.get_table_names():
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        leading = set()
+        for index in inspector.get_indexes(table):
+            leading |= _index_columns(index, columns)
+        for constraint in inspector.get_unique_constraints(table):
+            leading.add(constraint["column_names"][0])
+        primary_key = inspector.get_pk_constraint(table)["constrained_columns"]
+        if primary_key:
+            leading.add(primary_key[0])
+        indexed[table] = columns, leading
+    return indexed
+
+
+def _nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def check_plan(plan, indexed, estimate_ratio):
+    findings = []
+
+    for node in _nodes(plan["Plan"]):
+        table = node.get("Relation Name")
+        if node["Node Type"] == "Seq Scan":
+            table_columns, leading = indexed.get(table, (set(), set()))
+            condition = CAST.sub("", node.get("Filter", ""))
+            columns = set(FILTER_COLUMN.findall(condition)) & table_columns
+            missing = sorted(columns - leading)
+            findings.append(
+                Finding(
+                    "seq-scan",
+                    f"Seq Scan on {table}"
+                    + (f" filtering on {node['Filter']}" if columns else ""),
+                    table,
+                )
+            )
+            findings += [
+                Finding("missing-index", f"No index on {table}.{column}", table, column)
+                for column in missing
+            ]
+
+        if "Actual Rows" in node:
+            estimated = node["Plan Rows"]
+            actual = node["Actual Rows"]
+            low, high = sorted((max(estimated, 1), max(actual, 1)))
+            if high / low >= estimate_ratio:
+                findings.append(
+                    Finding(
+                        "estimate",
+                        f"{node['Node Type']}"
+                        + (f" on {table}" if table else "")
+                        + f" estimated {estimated} rows, got {actual}",
+                        table,
+                    )
+                )
+
+    return findings
+
+
+def audit_routes(app, estimate_ratio=10):
+    """Yield (endpoint, url, status, [(statement, plan, findings)])."""
+    engine = db.engine
+    indexed = _indexed_columns(engine)
+    client = app.test_client()
+
+    cache_enabled = app.config["PAGE_CACHE_ENABLED"]
+    app.config["PAGE_CACHE_ENABLED"] = False
+    try:
+        for endpoint, url in list(route_urls(app)):
+            with captured_statements(engine) as statements:
+                status = client.get(url).status_code
+
+            results = []
+            for statement, parameters in statements:
+                plan = explain(engine, statement, parameters)
+                results.append(
+                    (statement, plan, check_plan(plan, indexed, estimate_ratio))
+                )
+            yield endpoint, url, status, results
+    finally:
+        app.config["PAGE_CACHE_ENABLED"] = cache_enabled
+
+
+def index_migration(missing):
+    """Alembic operations creating an index per (table, column) pair."""
+    upgrade, downgrade = [], []
+    for table, column in sorted(missing):
+        name = f"ix_{table.lower()}_{column}"
+        upgrade.append(f'    op.create_index("{name}", "{table}", ["{column}"])')
+        downgrade.append(f'    op.drop_index("{name}", table_name="{table}")')
+
+    return "\n".join(
+        ["def upgrade():", *upgrade, "", "", "def downgrade():", *downgrade]
+    )
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import select
+
+from models import db, Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Streaming catalog export.
+#
+# Rows are read through a server-side cursor (``yield_per``) and serialized
+# into chunks of roughly ``CHUNK_SIZE`` bytes, optionally gzip-compressed as
+# they go, so memory use does not grow with the table.
+# ----------------------------------------------------------------------------#
+
+EXPORTS = {"venues": Venue, "artists": Artist, "shows": Show}
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ",".join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _lines(columns, rows, fmt):
+    keys = [column.key for column in columns]
+
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(
+                dict(zip(keys, row)), default=_json_default, separators=(",", ":")
+            ) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(keys)
+    yield flush()
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        yield flush()
+
+
+def _chunks(lines):
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(pending).encode()
+            pending, size = [], 0
+
+    if pending:
+        yield "".join(pending).encode()
+
+
+def _gzipped(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_rows(entity, fmt, batch_size=1000, compress=False):
+    """Yield the ``entity`` table serialized as ``fmt`` in byte chunks,
+    ordered by id."""
+    columns = list(EXPORTS[entity].__table__.columns)
+    rows = db.session.execute(
+        select(*columns)
+        .order_by(columns[0].table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    chunks = _chunks(_lines(columns, rows, fmt))
+    return _gzipped(chunks) if compress else chunks
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import dateutil.parser
+from babel import Locale
+from babel.dates import parse_pattern
+
+# ----------------------------------------------------------------------------#
+# Datetime formatting for templates.
+#
+# babel.dates.format_datetime re-resolves the locale and looks the pattern up
+# on every call. Here both are resolved once, and formatted strings are
+# memoized since the same show times repeat across tiles and pages.
+# ----------------------------------------------------------------------------#
+
+FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def get_locale(name):
+    return Locale.parse(name)
+
+
+@lru_cache(maxsize=None)
+def get_pattern(format, locale):
+    if format in FORMATS:
+        return parse_pattern(FORMATS[format])
+
+    babel_locale = get_locale(locale)
+    if format in babel_locale.datetime_formats:
+        # A named locale format ("short", "long", ...): combine the locale's
+        # date and time patterns the way babel.dates.format_datetime does.
+        return parse_pattern(
+            babel_locale.datetime_formats[format]
+            .replace("{0}", babel_locale.time_formats[format].pattern)
+            .replace("{1}", babel_locale.date_formats[format].pattern)
+        )
+
+    return parse_pattern(format)
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = dateutil.parser.parse(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        # Same as Babel: naive datetimes are taken as UTC.
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _memo_key(value):
+    # Equal instants with different offsets compare (and hash) equal but
+    # format differently.
+    return value, value.utcoffset() if isinstance(value, datetime) else None
+
+
+@lru_cache(maxsize=8192)
+def _format(key, format, locale):
+    return get_pattern(format, locale).apply(key[0], get_locale(locale))
+
+
+def format_datetime(value, format="medium", locale="en"):
+    return _format(_memo_key(_to_datetime(value)), format, locale)
+
+
+def format_many(values, format="medium", locale="en"):
+    """Format a batch of datetimes, resolving the pattern and locale once and
+    each distinct value once."""
+    pattern = get_pattern(format, locale)
+    babel_locale = get_locale(locale)
+    formatted = {}
+
+    result = []
+    for value in values:
+        value = _to_datetime(value)
+        key = _memo_key(value)
+        if key not in formatted:
+            formatted[key] = pattern.apply(value, babel_locale)
+        result.append(formatted[key])
+
+    return result
@@ -22,22 +22,32 @@ class ShowForm(Form):
     def __init__(self, formdata=None, **kwargs):
         super().__init__(formdata, **kwargs)
 
-        if "artists" in kwargs:
-            self.artist_id.choices = [
-                (artist.id, artist.name) for artist in kwargs["artists"]
-            ]
-
-        if "venues" in kwargs:
-            self.venue_id.choices = [
-                (venue.id, venue.name) for venue in kwargs["venues"]
-            ]
-
-    artist_id = SelectField("artist_id", validators=[DataRequired()])
-    venue_id = SelectField("venue_id", validators=[DataRequired()])
+        # Choices are (id, name) pairs; without them the template renders an
+        # id input instead of a select, and the *_exists callables validate
+        # posted ids.
+        self.artist_id.choices = kwargs.get("artist_choices") or []
+        self.venue_id.choices = kwargs.get("venue_choices") or []
+        self.artist_exists = kwargs.get("artist_exists")
+        self.venue_exists = kwargs.get("venue_exists")
+
+    artist_id = SelectField(
+        "artist_id", validators=[DataRequired()], coerce=int, validate_choice=False
+    )
+    venue_id = SelectField(
+        "venue_id", validators=[DataRequired()], coerce=int, validate_choice=False
+    )
     start_time = DateTimeField(
         "start_time", validators=[DataRequired()], default=datetime.today()
     )
 
+    def validate_artist_id(self, field):
+        if self.artist_exists and not self.artist_exists(field.data):
+            raise ValidationError("Unknown artist")
+
+    def validate_venue_id(self, field):
+        if self.venue_exists and not self.venue_exists(field.data):
+            raise ValidationError("Unknown venue")
+
 
 class VenueForm(Form):
     name = StringField("name", validators=[DataRequired()])
@@ -3,45 +3,74 @@ from itertools import groupby
 
 
 def group_by(iterable: Iterable, key_selector, value_selector=None):
+    """Group items into a dict of lists in a single pass. Input order does
+    not matter; keys keep the order in which they were first seen."""
     result = dict()
 
-    for key, values in groupby(iterable, key_selector):
-        mapped_values = values if value_selector is None else map(
-            value_selector, values)
-        if key in result:
-            result[key].append(mapped_values)
+    for item in iterable:
+        key = key_selector(item)
+        value = item if value_selector is None else value_selector(item)
+
+        values = result.get(key)
+        if values is None:
+            result[key] = [value]
         else:
-            result[key] = list(mapped_values)
+            values.append(value)
 
     return result
 
 
-def map_field_names(keys: tuple, fields_names: list):
-    result = {}
-
-    for index in range(len(fields_names)):
-        field_name = fields_names[index]
-        key_value = keys[index]
+def iter_sorted_groups(iterable: Iterable, key_selector, value_selector=None):
+    """Yield (key, values) for each run of equal keys. Only one group is held
+    at a time, so the input must already be sorted (or at least clustered) by
+    key; a key split over several runs is yielded once per run."""
+    for key, items in groupby(iterable, key_selector):
+        if value_selector is None:
+            yield key, list(items)
+        else:
+            yield key, [value_selector(item) for item in items]
 
-        result[field_name] = key_value
 
-    return result
+def map_field_names(keys: tuple, fields_names: list):
+    return dict(zip(fields_names, keys))
 
 
-def group_by_multiple_key(
+def iter_group_by_multiple_key(
     iterable: Iterable,
     key_selector,
     value_selector,
     keys_field_names,
     value_field_name="values",
+    presorted=False,
 ):
-    result = []
+    groups = (
+        iter_sorted_groups(iterable, key_selector, value_selector)
+        if presorted
+        else group_by(iterable, key_selector, value_selector).items()
+    )
 
-    for key, original_values in group_by(iterable, key_selector).items():
+    for key, values in groups:
         result_item = map_field_names(key, keys_field_names)
-        mapped_values = map(value_selector, original_values)
-        result_item[value_field_name] = list(mapped_values)
+        result_item[value_field_name] = values
 
-        result.append(result_item)
+        yield result_item
 
-    return result
+
+def group_by_multiple_key(
+    iterable: Iterable,
+    key_selector,
+    value_selector,
+    keys_field_names,
+    value_field_name="values",
+    presorted=False,
+):
+    return list(
+        iter_group_by_multiple_key(
+            iterable,
+            key_selector,
+            value_selector,
+            keys_field_names,
+            value_field_name,
+            presorted,
+        )
+    )
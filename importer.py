@@ -0,0 +1,200 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from flask import Flask
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from werkzeug.datastructures import MultiDict
+
+from forms import ArtistForm, VenueForm, ShowForm
+from models import db, Venue, Artist, Show, bump_revision
+
+# ----------------------------------------------------------------------------#
+# Bulk import of venues, artists and shows from CSV or JSONL files.
+#
+# Rows are validated with the same forms as the web handlers, spread over a
+# process pool, and upserted in batches on each model's natural key so a
+# retried import does not create duplicates.
+# ----------------------------------------------------------------------------#
+
+
+class Importer:
+    def __init__(self, form, model, natural_key, update_existing=True):
+        self.form = form
+        self.model = model
+        self.natural_key = natural_key
+        self.update_existing = update_existing
+        self.columns = {column.key for column in model.__table__.columns}
+
+
+IMPORTERS = {
+    "venue": Importer(VenueForm, Venue, ("name", "city", "state")),
+    "artist": Importer(ArtistForm, Artist, ("name", "city", "state")),
+    "show": Importer(
+        ShowForm, Show, ("venue_id", "artist_id", "start_time"), update_existing=False
+    ),
+}
+
+
+def read_rows(path):
+    """Yield (line number, row dict) from a .csv or .jsonl file."""
+    with open(path, newline="") as file:
+        if path.endswith(".jsonl"):
+            for line_number, line in enumerate(file, 1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+        else:
+            # Line 1 is the header.
+            for line_number, row in enumerate(csv.DictReader(file), 2):
+                yield line_number, row
+
+
+def _formdata(row):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if isinstance(value, list):
+            formdata.setlist(key, [str(item) for item in value])
+        elif key == "genres" and isinstance(value, str):
+            formdata.setlist(key, [item.strip() for item in value.split(",")])
+        elif isinstance(value, bool):
+            if value:
+                formdata[key] = "y"
+        elif value is not None:
+            formdata[key] = str(value)
+    return formdata
+
+
+def _init_worker():
+    # FlaskForm reads its settings from the current app.
+    Flask(__name__).app_context().push()
+
+
+def _validate_chunk(kind, chunk):
+    importer = IMPORTERS[kind]
+    valid, rejected = [], []
+
+    for line_number, row in chunk:
+        form = importer.form(_formdata(row), meta={"csrf": False})
+        if form.validate():
+            record = {
+                key: value
+                for key, value in form.data.items()
+                if key in importer.columns
+            }
+            valid.append((line_number, record))
+        else:
+            rejected.append((line_number, form.errors))
+
+    return valid, rejected
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _validated_batches(kind, rows, batch_size, workers):
+    """Validate chunks in a process pool, keeping a bounded number in flight
+    so the input is streamed, and yield results in input order."""
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+        pending = deque()
+        for chunk in _chunks(rows, batch_size):
+            pending.append(executor.submit(_validate_chunk, kind, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _split_unknown_references(valid):
+    """Shows must point at existing venues and artists. Return the records
+    that do, and rejections for those that do not."""
+    existing = {}
+    for model, key in ((Venue, "venue_id"), (Artist, "artist_id")):
+        ids = {record[key] for _, record in valid}
+        existing[key] = set(
+            db.session.scalars(select(model.id).where(model.id.in_(ids)))
+        )
+
+    known, rejected = [], []
+    for line_number, record in valid:
+        unknown = [key for key in existing if record[key] not in existing[key]]
+        if unknown:
+            rejected.append((line_number, {key: ["Not found"] for key in unknown}))
+        else:
+            known.append((line_number, record))
+
+    return known, rejected
+
+
+def _upsert(importer, records):
+    """Insert or update ``records`` and return how many rows were written.
+    Rows skipped by ON CONFLICT DO NOTHING are not returned, so not counted.
+    """
+    # A batch may repeat a natural key; ON CONFLICT cannot touch a row twice.
+    records = list(
+        {
+            tuple(record[key] for key in importer.natural_key): record
+            for record in records
+        }.values()
+    )
+
+    table = importer.model.__table__
+    statement = insert(table)
+    if importer.update_existing:
+        statement = statement.on_conflict_do_update(
+            index_elements=importer.natural_key,
+            set_={
+                **{
+                    key: statement.excluded[key]
+                    for key in records[0]
+                    if key not in importer.natural_key
+                },
+                "version": table.c.version + 1,
+                "updated_at": func.now(),
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=importer.natural_key
+        )
+
+    written = len(db.session.execute(statement.returning(table.c.id), records).all())
+    bump_revision(db.session.connection(), table.name)
+    return written
+
+
+def import_file(kind, path, batch_size=1000, workers=None, on_rejected=None):
+    """Import ``path`` into the ``kind`` table and return (processed,
+    imported, rejected, seconds): rows read, rows inserted or updated, and
+    rows failing validation. The caller refreshes derived data afterwards."""
+    importer = IMPORTERS[kind]
+    processed = imported = rejected = 0
+    started = time.perf_counter()
+
+    batches = _validated_batches(
+        kind, read_rows(path), batch_size, workers or os.cpu_count()
+    )
+    for valid, invalid in batches:
+        if kind == "show" and valid:
+            valid, unknown = _split_unknown_references(valid)
+            invalid += unknown
+
+        if valid:
+            imported += _upsert(importer, [record for _, record in valid])
+            db.session.commit()
+
+        processed += len(valid) + len(invalid)
+        rejected += len(invalid)
+        if on_rejected is not None:
+            for line_number, errors in invalid:
+                on_rejected(line_number, errors)
+
+    return processed, imported, rejected, time.perf_counter() - started
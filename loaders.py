@@ -0,0 +1,24 @@
+from sqlalchemy.orm import selectinload
+
+from models import Venue
+
+# ----------------------------------------------------------------------------#
+# Relationship loading profiles.
+#
+# Venue.shows and Artist.shows default to noload, which is all the edit forms
+# and list pages need. A query that needs them picks a profile registered
+# below, e.g.
+#
+#     Venue.query.options(*loader_profile(Venue, "delete")).get_or_404(venue_id)
+# ----------------------------------------------------------------------------#
+
+PROFILES = {
+    Venue: {
+        # Deleting needs the shows loaded so their foreign keys are cleared.
+        "delete": (selectinload(Venue.shows),),
+    },
+}
+
+
+def loader_profile(model, name):
+    return PROFILES[model][name]
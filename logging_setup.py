@@ -0,0 +1,288 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+from tracing import current_trace_id
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: the log is not shared between processes there.
+    fcntl = None
+
+# ----------------------------------------------------------------------------#
+# Non-blocking structured logging.
+#
+# Request threads only put records on an in-memory queue; a listener thread
+# per worker formats them as JSON lines and appends them to LOG_FILE. The file
+# is rotated by size and age under an flock, so any number of workers can
+# share it. Without flock (Windows) it is rotated by size only, by a single
+# process. Records are sampled per level and dropped (and counted) rather
+# than blocking when the queue is full.
+# ----------------------------------------------------------------------------#
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _STANDARD_ATTRIBUTES
+        )
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        if record.levelno >= logging.WARNING:
+            data["source"] = f"{record.pathname}:{record.lineno}"
+        return json.dumps(data, default=str, separators=(",", ":"))
+
+
+class RequestContextFilter(logging.Filter):
+    """Add the current request's route, latency, query count and trace id.
+    Runs in the thread that logs, before the record is queued."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+
+        record.route = request.endpoint
+        record.method = request.method
+        record.path = request.path
+        trace_id = current_trace_id()
+        if trace_id is not None:
+            record.trace_id = trace_id
+
+        started = g.get("request_started")
+        if started is not None:
+            record.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        stats = g.get("sql_stats")
+        if stats is not None and not hasattr(record, "query_count"):
+            record.query_count = stats.count
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep each record with the probability configured for its level."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level): rate for level, rate in rates.items()
+        }
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class LockingRotatingFileHandler(logging.Handler):
+    """Append to ``path``, rotating to ``path.1`` ... ``path.<backup_count>``
+    when the file exceeds ``max_bytes`` or ``max_age`` seconds. Rotation and
+    writes are serialized between processes with an flock on ``path.lock``,
+    which also records when the current file was started."""
+
+    def __init__(self, path, max_bytes, max_age, backup_count):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self._pid = None
+        self._lock_file = None
+        self._stream = None
+        self._inode = None
+
+    def _reopen_after_fork(self):
+        # flock is held per open file, so each process needs its own.
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._lock_file = open(f"{self.path}.lock", "a+")
+        self._stream = None
+
+    def emit(self, record):
+        try:
+            line = (self.format(record) + "\n").encode()
+            self._reopen_after_fork()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._rotate_if_due(len(line))
+                self._open().write(line)
+                self._stream.flush()
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def _open(self):
+        # Another worker may have rotated the file since we opened it.
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self._stream is None or inode != self._inode:
+            if self._stream is not None:
+                self._stream.close()
+            self._stream = open(self.path, "ab")
+            self._inode = os.fstat(self._stream.fileno()).st_ino
+        return self._stream
+
+    def _started_at(self):
+        self._lock_file.seek(0)
+        try:
+            return float(self._lock_file.read() or 0)
+        except ValueError:
+            return 0.0
+
+    def _mark_started(self, when):
+        self._lock_file.seek(0)
+        self._lock_file.truncate()
+        self._lock_file.write(str(when))
+        self._lock_file.flush()
+
+    def _rotate_if_due(self, incoming):
+        now = time.time()
+        started = self._started_at()
+        if not started:
+            self._mark_started(now)
+            return
+
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+
+        too_big = self.max_bytes and size + incoming > self.max_bytes
+        too_old = self.max_age and now - started >= self.max_age
+        if not (size and (too_big or too_old)):
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._mark_started(now)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        super().close()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that starts its listener lazily in each worker process
+    and drops records instead of blocking when the queue is full."""
+
+    def __init__(self, queue_, handlers):
+        super().__init__(queue_)
+        self.target_handlers = handlers
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._listener = QueueListener(
+                    self.queue, *self.target_handlers, respect_handler_level=True
+                )
+                self._listener.start()
+                self._pid = os.getpid()
+                atexit.register(self._listener.stop)
+
+    def prepare(self, record):
+        # Keep the message and traceback as separate fields for the JSON
+        # formatter instead of QueueHandler's preformatted text.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.makeLogRecord(
+                {
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"{dropped} log records dropped, queue was full",
+                }
+            )
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self.dropped += dropped
+
+
+def configure_logging(app):
+    """Send ``app.logger`` through a queue to a shared, rotated JSON log."""
+    if fcntl is not None:
+        file_handler = LockingRotatingFileHandler(
+            app.config["LOG_FILE"],
+            app.config["LOG_MAX_BYTES"],
+            app.config["LOG_MAX_AGE"],
+            app.config["LOG_BACKUP_COUNT"],
+        )
+    else:
+        file_handler = RotatingFileHandler(
+            app.config["LOG_FILE"],
+            maxBytes=app.config["LOG_MAX_BYTES"],
+            backupCount=app.config["LOG_BACKUP_COUNT"],
+        )
+    file_handler.setFormatter(JsonFormatter())
+
+    handler = NonBlockingQueueHandler(
+        queue.Queue(app.config["LOG_QUEUE_SIZE"]), [file_handler]
+    )
+    handler.addFilter(SamplingFilter(app.config["LOG_SAMPLE_RATES"]))
+    handler.addFilter(RequestContextFilter())
+
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+    # Flask's default handler writes to stderr on the request thread.
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(handler)
+    return handler
@@ -0,0 +1,193 @@
+import gc
+import json
+import linecache
+import os
+import threading
+import tracemalloc
+from collections import Counter
+
+from flask import current_app, g, render_template, request
+
+from admin import admin, admin_required
+
+# ----------------------------------------------------------------------------#
+# Per-route memory allocation tracking.
+#
+# With MEMTRACK_ENABLED, tracemalloc runs in every worker and each request
+# records the memory it allocated and did not free (net) and its peak above
+# the starting point. Every MEMTRACK_SNAPSHOT_EVERY-th request of an endpoint
+# also diffs two snapshots to find the lines allocating the most. Workers
+# write their totals to MEMTRACK_DIR, read by /admin/memory and
+# ``flask memory-report``.
+#
+# tracemalloc is process-wide, so figures are exact with one request per
+# process at a time (sync workers) and approximate with threaded servers.
+# ----------------------------------------------------------------------------#
+
+
+class RouteMemory:
+    def __init__(self):
+        self.requests = 0
+        self.net_total = 0
+        self.peak_total = 0
+        self.peak_max = 0
+        self.lines = Counter()
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "net_total": self.net_total,
+            "peak_total": self.peak_total,
+            "peak_max": self.peak_max,
+            "lines": dict(self.lines.most_common(20)),
+        }
+
+
+class MemoryTracker:
+    def __init__(self):
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, net, peak, lines=None):
+        with self._lock:
+            route = self.routes.setdefault(endpoint, RouteMemory())
+            route.requests += 1
+            route.net_total += net
+            route.peak_total += peak
+            route.peak_max = max(route.peak_max, peak)
+            if lines:
+                route.lines.update(lines)
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                endpoint: route.to_dict() for endpoint, route in self.routes.items()
+            }
+
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(data, file)
+        os.replace(path + ".tmp", path)
+
+
+tracker = MemoryTracker()
+
+
+def _top_lines(before, after, limit=10):
+    """{"file:line  source": bytes} of the lines that grew the most."""
+    lines = {}
+    for stat in after.compare_to(before, "lineno")[:limit]:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        lines[f"{frame.filename}:{frame.lineno}  {source}"] = stat.size_diff
+    return lines
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+        )
+    )
+
+
+def init_memtrack(app):
+    if not app.config["MEMTRACK_ENABLED"]:
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(app.config["MEMTRACK_FRAMES"])
+    seen = Counter()
+
+    @app.before_request
+    def start_tracking():
+        endpoint = request.endpoint or "unmatched"
+        seen[endpoint] += 1
+        if seen[endpoint] % app.config["MEMTRACK_SNAPSHOT_EVERY"] == 0:
+            g.memory_snapshot = _snapshot()
+
+        tracemalloc.reset_peak()
+        g.memory_start = tracemalloc.get_traced_memory()[0]
+
+    @app.teardown_request
+    def stop_tracking(error=None):
+        start = g.pop("memory_start", None)
+        if start is None:
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        before = g.pop("memory_snapshot", None)
+        lines = None if before is None else _top_lines(before, _snapshot())
+
+        tracker.record(
+            request.endpoint or "unmatched", current - start, peak - start, lines
+        )
+        if lines is not None:
+            tracker.write(app.config["MEMTRACK_DIR"])
+
+
+def object_counts(limit=30):
+    """The most common live object types in this process."""
+    return Counter(type(item).__name__ for item in gc.get_objects()).most_common(limit)
+
+
+def merged_report(directory):
+    """Per-endpoint totals summed over every worker's file, largest average
+    net allocation first."""
+    routes = {}
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+
+        for endpoint, stats in data.items():
+            route = routes.setdefault(
+                endpoint,
+                {"requests": 0, "net_total": 0, "peak_total": 0, "peak_max": 0},
+            )
+            route.setdefault("lines", Counter()).update(stats["lines"])
+            route["requests"] += stats["requests"]
+            route["net_total"] += stats["net_total"]
+            route["peak_total"] += stats["peak_total"]
+            route["peak_max"] = max(route["peak_max"], stats["peak_max"])
+
+    report = []
+    for endpoint, route in routes.items():
+        requests = max(route["requests"], 1)
+        report.append(
+            {
+                "endpoint": endpoint,
+                "requests": route["requests"],
+                "net_avg": route["net_total"] / requests,
+                "peak_avg": route["peak_total"] / requests,
+                "peak_max": route["peak_max"],
+                "lines": route["lines"].most_common(10),
+            }
+        )
+
+    return sorted(report, key=lambda route: route["net_avg"], reverse=True)
+
+
+@admin.route("/memory")
+@admin_required
+def memory():
+    if current_app.config["MEMTRACK_ENABLED"]:
+        # Include this worker's latest numbers.
+        tracker.write(current_app.config["MEMTRACK_DIR"])
+
+    return render_template(
+        "admin/memory.html",
+        enabled=current_app.config["MEMTRACK_ENABLED"],
+        routes=merged_report(current_app.config["MEMTRACK_DIR"]),
+        objects=object_counts(),
+    )
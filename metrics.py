@@ -0,0 +1,135 @@
+import os
+import time
+
+from flask import Response, g, request, template_rendered, before_render_template
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import QueuePool
+
+# ----------------------------------------------------------------------------#
+# Prometheus metrics, served at /metrics.
+#
+# Under a pre-forking server, start every worker with PROMETHEUS_MULTIPROC_DIR
+# pointing at an empty directory: each process then writes its samples there
+# and /metrics sums them over all workers. The server should call
+# ``mark_process_dead(pid)`` when a worker exits (gunicorn: ``child_exit``).
+# ----------------------------------------------------------------------------#
+
+REQUEST_SECONDS = Histogram(
+    "fyyur_request_duration_seconds",
+    "Time spent handling a request.",
+    ["endpoint", "method", "status"],
+)
+TEMPLATE_SECONDS = Histogram(
+    "fyyur_template_render_seconds",
+    "Time spent rendering a Jinja template.",
+    ["template"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+POOL_WAIT_SECONDS = Histogram(
+    "fyyur_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+POOL_IN_USE = Gauge(
+    "fyyur_db_pool_connections_in_use",
+    "Database connections currently checked out.",
+    multiprocess_mode="livesum",
+)
+CACHE_LOOKUPS = Counter(
+    "fyyur_cache_lookups_total",
+    "Lookups in the in-process caches, by result.",
+    ["cache", "result"],
+)
+
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def mark_process_dead(pid):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording checkout waits and connections in use."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+        POOL_IN_USE.inc()
+        return record
+
+    def _do_return_conn(self, record):
+        POOL_IN_USE.dec()
+        super()._do_return_conn(record)
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view():
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Time requests and templates and serve /metrics. Must run before
+    ``db.init_app`` so the engine is created with the timed pool."""
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].setdefault("poolclass", TimedQueuePool)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def observe_request(error=None):
+        # Teardown also runs for requests that failed with an unhandled
+        # exception, which never reach after_request.
+        started = g.get("request_started")
+        if started is not None:
+            # Unmatched URLs share one label to bound the series count.
+            endpoint = request.endpoint or "unmatched"
+            status = g.get("response_status", 500)
+            REQUEST_SECONDS.labels(endpoint, request.method, status).observe(
+                time.perf_counter() - started
+            )
+
+    def start_render(sender, template, context, **extra):
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+    def observe_render(sender, template, context, **extra):
+        starts = g.get("template_starts")
+        if starts:
+            TEMPLATE_SECONDS.labels(template.name).observe(
+                time.perf_counter() - starts.pop()
+            )
+
+    # Signals hold weak references; these closures have no other owner.
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(observe_render, app, weak=False)
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -1,13 +1,61 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import insert
 
 # ----------------------------------------------------------------------------#
 # Models.
 # ----------------------------------------------------------------------------#
 db = SQLAlchemy()
 
+# Name search relies on trigram GIN indexes (see search.py).
+event.listen(
+    db.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
 
-class Venue(db.Model):
+
+def name_trigram_index(name):
+    return db.Index(
+        name,
+        db.func.lower(db.literal_column("name")).label("lower_name"),
+        postgresql_using="gin",
+        postgresql_ops={"lower_name": "gin_trgm_ops"},
+    )
+
+
+class Versioned:
+    """Columns identifying a row's revision, used for conditional GETs.
+
+    ``version`` is bumped on every ORM update (see ``bump_version``) and by
+    the show counter hooks, ``updated_at`` follows along."""
+
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+
+class Venue(Versioned, db.Model):
     __tablename__ = "Venue"
+    __table_args__ = (
+        # Key of the /venues listing, which lists missing states and cities
+        # as empty ones.
+        db.Index(
+            "ix_venue_state_city_id",
+            db.func.coalesce(db.literal_column("state"), ""),
+            db.func.coalesce(db.literal_column("city"), ""),
+            "id",
+        ),
+        name_trigram_index("ix_venue_name_trgm"),
+        # Natural key used by upserting imports (see importer.py). The web
+        # forms report a clash as a duplicate listing (see app.py). Rows
+        # duplicating it must be merged before adding it to an existing
+        # database.
+        db.UniqueConstraint(
+            "name", "city", "state", name="uq_venue_name_city_state"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -21,13 +69,24 @@ class Venue(db.Model):
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0")
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0")
 
+    # Loaded per query through the profiles in loaders.py.
     shows = db.relationship("Show", back_populates="venue",
-                            lazy="joined", uselist=True)
+                            lazy="noload", uselist=True)
 
 
-class Artist(db.Model):
+class Artist(Versioned, db.Model):
     __tablename__ = "Artist"
+    __table_args__ = (
+        name_trigram_index("ix_artist_name_trgm"),
+        # Natural key, as for Venue.
+        db.UniqueConstraint(
+            "name", "city", "state", name="uq_artist_name_city_state"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -40,20 +99,75 @@ class Artist(db.Model):
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0")
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0")
 
     shows = db.relationship("Show", back_populates="artist",
-                            lazy="joined", uselist=True)
+                            lazy="noload", uselist=True)
 
 
-class Show(db.Model):
+class Show(Versioned, db.Model):
     __tablename__ = "Show"
+    __table_args__ = (
+        # Serves the periodic rollover of upcoming shows into past shows.
+        db.Index("ix_show_upcoming_start_time", "start_time",
+                 postgresql_where=db.text("NOT counted_as_past")),
+        # Keyset paging of /shows on (start_time, id).
+        db.Index("ix_show_start_time_id", "start_time", "id"),
+        # Calendar windows and show lists of one venue or artist.
+        db.Index("ix_show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_show_artist_id_start_time", "artist_id", "start_time"),
+        db.UniqueConstraint(
+            "venue_id", "artist_id", "start_time",
+            name="uq_show_venue_artist_start_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey(Venue.id))
     artist_id = db.Column(db.Integer, db.ForeignKey(Artist.id))
     start_time = db.Column(db.DateTime(timezone=True))
+    counted_as_past = db.Column(
+        db.Boolean, nullable=False, default=False, server_default=db.false())
 
     venue = db.relationship(
         "Venue", back_populates="shows")
     artist = db.relationship(
         "Artist", back_populates="shows")
+
+
+class Revision(db.Model):
+    """One counter per table, bumped in the same transaction as every insert,
+    update or delete of its rows. Listing pages derive their ETag from it
+    with a primary key lookup instead of scanning the table."""
+    __tablename__ = "Revision"
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, server_default="0")
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+
+def bump_revision(connection, table_name):
+    # Upsert, so no row has to be seeded per table.
+    statement = insert(Revision.__table__).values(name=table_name, value=1)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[Revision.name],
+        set_={"value": Revision.value + 1, "updated_at": db.func.now()},
+    ))
+
+
+def bump_table_revision(mapper, connection, target):
+    bump_revision(connection, mapper.local_table.name)
+
+
+def bump_version(mapper, connection, target):
+    if db.session.is_modified(target, include_collections=False):
+        target.version = mapper.class_.version + 1
+
+
+for model in (Venue, Artist, Show):
+    event.listen(model, "before_update", bump_version)
+    for change in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, change, bump_table_revision)
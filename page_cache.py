@@ -0,0 +1,170 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, session, make_response
+
+from metrics import cache_lookup
+from tracing import span
+
+# ----------------------------------------------------------------------------#
+# Rendered page cache.
+#
+# GET responses are stored gzip-compressed per URL together with a set of
+# tags (e.g. "venue:42", "area:CA/San Francisco", "shows:list"). Write
+# handlers purge tags; entries also expire after their TTL, which bounds how
+# long other worker processes can serve a purged page. Pages also behind
+# conditional_page store the version they were rendered at, so a write made
+# by another process is picked up as soon as the version lookup sees it.
+# ----------------------------------------------------------------------------#
+
+
+class CachedPage:
+    __slots__ = ("body", "mimetype", "expires_at", "tags", "version")
+
+    def __init__(self, body, mimetype, expires_at, tags, version=None):
+        self.body = body
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+        self.tags = tags
+        self.version = version
+
+    def to_response(self):
+        if "gzip" in request.accept_encodings:
+            response = make_response(self.body)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = make_response(gzip.decompress(self.body))
+
+        response.mimetype = self.mimetype
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+class PageCache:
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        """The entry for ``key``, or None if it is missing, expired or was
+        rendered at another version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.expires_at <= time.monotonic() or entry.version != version:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body, mimetype, ttl, tags, version=None):
+        entry = CachedPage(
+            gzip.compress(body, 6),
+            mimetype,
+            time.monotonic() + ttl,
+            frozenset(tags),
+            version,
+        )
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+        return entry
+
+    def purge(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+page_cache = PageCache()
+
+
+def add_cache_tags(*tags):
+    """Tag the page being rendered with tags only known inside the view,
+    e.g. the artists listed on a venue page."""
+    g.setdefault("cache_tags", set()).update(tags)
+
+
+def area_tag(state, city):
+    # /venues lists a missing state or city as an empty one.
+    return f"area:{state or ''}/{city or ''}"
+
+
+def cached_page(ttl, *tags):
+    """Cache a GET view's rendered body for ``ttl`` seconds. ``tags`` are
+    strings, or callables receiving the view arguments and returning a tag.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # Pages carrying flashed messages are one-off, and a profiled
+            # request must measure the view rather than a cache hit.
+            if (
+                not current_app.config["PAGE_CACHE_ENABLED"]
+                or "_flashes" in session
+                or "profile" in g
+            ):
+                return view(**kwargs)
+
+            key = request.full_path
+            # Set by conditional_page when it wraps this view.
+            version = g.get("page_version")
+            with span("cache.lookup", cache="page") as lookup:
+                entry = page_cache.get(key, version)
+                lookup.set("hit", entry is not None)
+            cache_lookup("page", entry is not None)
+            if entry is None:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                page_tags = {tag(**kwargs) if callable(tag) else tag for tag in tags}
+                page_tags.update(g.get("cache_tags", ()))
+                entry = page_cache.set(
+                    key,
+                    response.get_data(),
+                    response.mimetype,
+                    ttl,
+                    page_tags,
+                    version,
+                )
+
+            return entry.to_response()
+
+        return wrapper
+
+    return decorator
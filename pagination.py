@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Return the list of key values stored in ``cursor``, or None if the
+    cursor is missing or malformed."""
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != size:
+        return None
+
+    return values
+
+
+def decode_time_cursor(cursor):
+    """Return the (start_time, id) stored in a show cursor, or None if the
+    cursor is missing, malformed or holds values of the wrong type."""
+    values = decode_cursor(cursor, 2)
+    if values is None or not isinstance(values[0], str) or not is_id(values[1]):
+        return None
+
+    try:
+        return datetime.fromisoformat(values[0]), values[1]
+    except ValueError:
+        return None
+
+
+def decode_area_cursor(cursor):
+    """Return the (state, city, id) stored in a venue listing cursor, or None
+    if the cursor is missing, malformed or holds values of the wrong type.
+    Missing states and cities are stored as empty strings."""
+    values = decode_cursor(cursor, 3)
+    if values is None or not is_id(values[2]):
+        return None
+    if not isinstance(values[0], str) or not isinstance(values[1], str):
+        return None
+    return tuple(values)
+
+
+def is_id(value):
+    """Whether a decoded cursor value can be compared with an integer id;
+    JSON booleans decode to ``bool``, a subclass of ``int``."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def after_cursor(columns, values, descending=False):
+    """Keyset predicate selecting the rows strictly after ``values`` in the
+    ordering given by ``columns``."""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
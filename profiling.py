@@ -0,0 +1,174 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from flask import abort, current_app, g, render_template, request, send_file
+
+from admin import admin, admin_required, is_admin
+from sql_instrumentation import collect_queries
+
+# ----------------------------------------------------------------------------#
+# On-demand request profiling.
+#
+# An admin request with an ``X-Profile: 1`` header or a ``_profile=1`` query
+# argument runs under cProfile. The profile and the SQL the request issued
+# are stored in PROFILE_DIR under a profile id, returned in an X-Profile-Id
+# header and listed at /admin/profiles.
+# ----------------------------------------------------------------------------#
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{16}$")
+
+
+def _profile_requested():
+    wanted = "1" in (request.headers.get("X-Profile"), request.args.get("_profile"))
+    return wanted and is_admin()
+
+
+def _path(profile_id, extension):
+    return os.path.join(current_app.config["PROFILE_DIR"], f"{profile_id}.{extension}")
+
+
+def _save(profiler, stats, response, wall_seconds):
+    profile_id = uuid.uuid4().hex[:16]
+    os.makedirs(current_app.config["PROFILE_DIR"], exist_ok=True)
+
+    profiler.dump_stats(_path(profile_id, "prof"))
+    with open(_path(profile_id, "json"), "w") as file:
+        json.dump(
+            {
+                "id": profile_id,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "method": request.method,
+                "path": request.full_path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "wall_ms": wall_seconds * 1000,
+                "db_ms": stats.seconds * 1000,
+                "queries": [
+                    {"statement": statement, "ms": seconds * 1000}
+                    for statement, seconds in stats.log
+                ],
+            },
+            file,
+        )
+
+    _prune(current_app.config["PROFILE_KEEP"])
+    return profile_id
+
+
+def _prune(keep):
+    directory = current_app.config["PROFILE_DIR"]
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith(".json")),
+        key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+    )
+    for name in names[: max(len(names) - keep, 0)]:
+        profile_id = name[: -len(".json")]
+        for extension in ("json", "prof"):
+            try:
+                os.remove(_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+def _load(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(_path(profile_id, "json")) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def init_profiling(app):
+    @app.before_request
+    def start_profile():
+        if not _profile_requested():
+            return
+
+        profiler = cProfile.Profile()
+        stack = ExitStack()
+        g.profile_queries = stack.enter_context(collect_queries(keep_log=True))
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread.
+            stack.close()
+            return
+
+        g.profile = (profiler, stack, time.perf_counter())
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+
+        profiler, stack, started = profile
+        profiler.disable()
+        stack.close()
+
+        profile_id = _save(
+            profiler, g.profile_queries, response, time.perf_counter() - started
+        )
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def stop_profile(error=None):
+        # Only left over when the request failed before after_request.
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile[0].disable()
+            profile[1].close()
+
+
+@admin.route("/profiles")
+@admin_required
+def profiles():
+    directory = current_app.config["PROFILE_DIR"]
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    items = [_load(name[: -len(".json")]) for name in names if name.endswith(".json")]
+    items = sorted(filter(None, items), key=lambda item: item["wall_ms"], reverse=True)
+
+    return render_template("admin/profiles.html", profiles=items)
+
+
+@admin.route("/profiles/<profile_id>")
+@admin_required
+def profile(profile_id):
+    item = _load(profile_id)
+    if item is None:
+        abort(404)
+
+    stream = io.StringIO()
+    stats = pstats.Stats(_path(profile_id, "prof"), stream=stream)
+    stats.sort_stats("cumulative").print_stats(40)
+
+    return render_template(
+        "admin/profile.html",
+        profile=item,
+        stats=stream.getvalue(),
+    )
+
+
+@admin.route("/profiles/<profile_id>/download")
+@admin_required
+def download_profile(profile_id):
+    if _load(profile_id) is None:
+        abort(404)
+
+    return send_file(
+        _path(profile_id, "prof"),
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=f"{profile_id}.prof",
+    )
@@ -0,0 +1,191 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import Response, abort, current_app, render_template, request, send_file
+
+from admin import admin, admin_required
+
+# ----------------------------------------------------------------------------#
+# Always-on sampling profiler.
+#
+# A daemon thread in each worker wakes every SAMPLER_INTERVAL seconds and
+# records the Python stack of every thread that is handling a request. Stacks
+# are aggregated in the collapsed format read by flamegraph.pl and speedscope
+# ("outer;inner;leaf count") and written to SAMPLER_DIR once per
+# SAMPLER_ROTATE seconds, one file per worker and interval.
+# ----------------------------------------------------------------------------#
+
+STACKS_FILE = re.compile(r"^\d+-\d+\.collapsed$")
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    def __init__(self):
+        self.pid = None
+        self.active = set()
+        self.stacks = Counter()
+        self.sampling_seconds = 0.0
+        self.started_at = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, directory, interval, rotate, keep):
+        # Threads do not survive fork, so each worker starts its own.
+        if self.pid == os.getpid():
+            return
+
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.active = set()
+            self.stacks = Counter()
+            self.sampling_seconds = 0.0
+            self.started_at = time.perf_counter()
+            os.makedirs(directory, exist_ok=True)
+            threading.Thread(
+                target=self._run,
+                args=(directory, interval, rotate, keep),
+                name="stack-sampler",
+                daemon=True,
+            ).start()
+
+    def sample(self):
+        started = time.perf_counter()
+        frames = sys._current_frames()
+        for thread_id in self.active.copy():
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+        self.sampling_seconds += time.perf_counter() - started
+
+    def _run(self, directory, interval, rotate, keep):
+        interval_started = time.time()
+        while True:
+            time.sleep(interval)
+            self.sample()
+
+            if time.time() - interval_started >= rotate:
+                self._write(directory, interval_started)
+                _prune(directory, keep)
+                interval_started = time.time()
+
+    def _write(self, directory, interval_started):
+        stacks, self.stacks = self.stacks, Counter()
+        if not stacks:
+            return
+
+        path = os.path.join(directory, f"{int(interval_started)}-{self.pid}.collapsed")
+        with open(path, "w") as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def overhead(self):
+        """Share of this worker's wall time spent taking samples."""
+        if self.started_at is None:
+            return None
+        return self.sampling_seconds / max(time.perf_counter() - self.started_at, 1e-9)
+
+
+sampler = Sampler()
+
+
+def _prune(directory, keep):
+    # ``keep`` is a number of intervals per worker; files sort by start time.
+    names = sorted(name for name in os.listdir(directory) if STACKS_FILE.match(name))
+    workers = len({name.split("-")[1] for name in names}) or 1
+    for name in names[: max(len(names) - keep * workers, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def init_sampler(app):
+    if not app.config["SAMPLER_ENABLED"]:
+        return
+
+    @app.before_request
+    def track_request():
+        sampler.ensure_started(
+            app.config["SAMPLER_DIR"],
+            app.config["SAMPLER_INTERVAL"],
+            app.config["SAMPLER_ROTATE"],
+            app.config["SAMPLER_KEEP"],
+        )
+        sampler.active.add(threading.get_ident())
+
+    @app.teardown_request
+    def untrack_request(error=None):
+        sampler.active.discard(threading.get_ident())
+
+
+@admin.route("/stacks")
+@admin_required
+def stacks():
+    directory = current_app.config["SAMPLER_DIR"]
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    files = [
+        {
+            "name": name,
+            "started": datetime.fromtimestamp(int(name.split("-")[0]), timezone.utc),
+            "pid": int(name.split("-")[1].split(".")[0]),
+            "size": os.path.getsize(os.path.join(directory, name)),
+        }
+        for name in sorted(filter(STACKS_FILE.match, names), reverse=True)
+    ]
+
+    return render_template(
+        "admin/stacks.html",
+        files=files,
+        overhead=sampler.overhead(),
+    )
+
+
+@admin.route("/stacks/merged")
+@admin_required
+def merged_stacks():
+    """All workers' stacks of the last ``minutes`` (default 10) in one file."""
+    directory = current_app.config["SAMPLER_DIR"]
+    since = time.time() - request.args.get("minutes", 10, type=int) * 60
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+
+    merged = Counter()
+    for name in filter(STACKS_FILE.match, names):
+        if int(name.split("-")[0]) < since:
+            continue
+        with open(os.path.join(directory, name)) as file:
+            for line in file:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                merged[stack] += int(count)
+
+    body = "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+    return Response(
+        body,
+        mimetype="text/plain",
+        headers={"Content-Disposition": "attachment; filename=merged.collapsed"},
+    )
+
+
+@admin.route("/stacks/<name>")
+@admin_required
+def download_stacks(name):
+    if not STACKS_FILE.match(name):
+        abort(404)
+
+    path = os.path.join(current_app.config["SAMPLER_DIR"], name)
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="text/plain", as_attachment=True)
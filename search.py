@@ -0,0 +1,148 @@
+from datetime import datetime, timezone
+from math import ceil
+
+from sqlalchemy import DateTime, Integer, String, func, literal, null, or_
+from sqlalchemy import select, union_all
+
+from models import Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Name search.
+#
+# Both filters below are served by the pg_trgm GIN index on lower(name): the
+# substring match through LIKE and the fuzzy match through the similarity
+# operator (%). Results are ranked by trigram similarity.
+# ----------------------------------------------------------------------------#
+
+
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def name_matches(name_column, term):
+    name = func.lower(name_column)
+    return or_(name.like(f"%{escape_like(term)}%", escape="\\"), name.op("%")(term))
+
+
+def name_similarity(name_column, term):
+    return func.similarity(func.lower(name_column), term)
+
+
+def search_by_name(model, search_term, page=1, per_page=20):
+    term = search_term.strip().lower()
+    page = max(page, 1)
+    if not term:
+        # An empty term would match every row.
+        return {"count": 0, "data": [], "page": page, "pages": 0}
+
+    query = model.query.filter(name_matches(model.name, term))
+
+    rows = (
+        query.with_entities(
+            model.id,
+            model.name,
+            model.upcoming_shows_count.label("num_upcoming_shows"),
+            func.count().over().label("total"),
+        )
+        .order_by(name_similarity(model.name, term).desc(), model.name, model.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+
+    # The window count comes for free with any row; only a page past the end
+    # needs a separate count.
+    if rows:
+        count = rows[0].total
+    else:
+        count = query.count() if page > 1 else 0
+
+    return {
+        "count": count,
+        "data": rows,
+        "page": page,
+        "pages": ceil(count / per_page),
+    }
+
+
+# ----------------------------------------------------------------------------#
+# Unified search.
+#
+# Venues, artists and upcoming shows are fetched in a single UNION ALL, each
+# branch ranked and limited on its own and carrying its total match count.
+# ----------------------------------------------------------------------------#
+
+SEARCH_TYPES = ("venue", "artist", "show")
+
+
+def _entity_branch(kind, model, term, per_type):
+    rank = name_similarity(model.name, term)
+    return (
+        select(
+            literal(kind).label("type"),
+            model.id.label("id"),
+            model.name.label("name"),
+            null().cast(Integer).label("venue_id"),
+            null().cast(String).label("venue_name"),
+            null().cast(DateTime(timezone=True)).label("start_time"),
+            rank.label("rank"),
+            func.count().over().label("total"),
+        )
+        .where(name_matches(model.name, term))
+        .order_by(rank.desc(), model.name, model.id)
+        .limit(per_type)
+    )
+
+
+def _upcoming_show_branch(term, per_type, now):
+    rank = func.greatest(
+        name_similarity(Artist.name, term), name_similarity(Venue.name, term)
+    )
+    return (
+        select(
+            literal("show").label("type"),
+            Artist.id.label("id"),
+            Artist.name.label("name"),
+            Venue.id.label("venue_id"),
+            Venue.name.label("venue_name"),
+            Show.start_time.label("start_time"),
+            rank.label("rank"),
+            func.count().over().label("total"),
+        )
+        .join(Artist, Artist.id == Show.artist_id)
+        .join(Venue, Venue.id == Show.venue_id)
+        .where(Show.start_time >= now)
+        .where(or_(name_matches(Artist.name, term), name_matches(Venue.name, term)))
+        .order_by(rank.desc(), Show.start_time, Show.id)
+        .limit(per_type)
+    )
+
+
+def search_all(session, search_term, per_type=5):
+    term = search_term.strip().lower()
+    results = {kind: {"count": 0, "data": []} for kind in SEARCH_TYPES}
+    if not term:
+        return results
+
+    now = datetime.now(timezone.utc)
+
+    statement = union_all(
+        *(
+            select(branch.subquery())
+            for branch in (
+                _entity_branch("venue", Venue, term, per_type),
+                _entity_branch("artist", Artist, term, per_type),
+                _upcoming_show_branch(term, per_type, now),
+            )
+        )
+    )
+
+    for row in session.execute(statement):
+        results[row.type]["count"] = row.total
+        results[row.type]["data"].append(row)
+
+    # UNION ALL does not guarantee the branch order survives.
+    for group in results.values():
+        group["data"].sort(key=lambda row: row.rank, reverse=True)
+
+    return results
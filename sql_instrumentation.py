@@ -0,0 +1,190 @@
+import hashlib
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Per-request SQL statistics.
+#
+# Engine events count every statement and its time against the collectors
+# active in the current context: one per request, plus any opened by
+# ``query_budget`` in tests. Statements are grouped by a fingerprint of their
+# text without literal values, so the same query run once per row of a page
+# (an N+1) shows up as one fingerprint executed many times.
+# ----------------------------------------------------------------------------#
+
+_collectors = ContextVar("sql_collectors", default=())
+
+# Expanded IN lists and literals that vary between otherwise equal queries.
+_PARAMETER_LIST = re.compile(
+    r"\(\s*(%\(\w+\)s|\?|\$\d+)(\s*,\s*(%\(\w+\)s|\?|\$\d+))*\s*\)"
+)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement):
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def fingerprint(statement):
+    return hashlib.sha1(normalize(statement).encode()).hexdigest()[:12]
+
+
+class QueryStats:
+    def __init__(self, keep_log=False):
+        # With ``keep_log``, every (statement, seconds) is kept in ``log``.
+        self.log = [] if keep_log else None
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.statements = {}
+
+    def record(self, statement, seconds):
+        key = fingerprint(statement)
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[key] += 1
+        self.statements.setdefault(key, statement)
+        if self.log is not None:
+            self.log.append((statement, seconds))
+
+    def repeated(self, threshold):
+        """(fingerprint, count, statement) of queries run ``threshold`` or
+        more times, most frequent first."""
+        return [
+            (key, count, self.statements[key])
+            for key, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def collect_queries(keep_log=False):
+    stats = QueryStats(keep_log)
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries):
+    """Fail if the block runs more than ``max_queries`` statements, e.g.
+
+    with query_budget(3):
+        client.get("/venues/1")
+    """
+    with collect_queries() as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} queries run, budget was {max_queries}:\n"
+            + "\n".join(
+                f"  {count}x {normalize(statement)}"
+                for _, count, statement in stats.repeated(1)
+            )
+        )
+
+
+# The start time lives on the statement's execution context; after_cursor_execute
+# does not run for a statement that raises, which is recorded by handle_error.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if context is not None and _collectors.get():
+        context._query_started = time.perf_counter()
+
+
+def _record(context, statement):
+    started = getattr(context, "_query_started", None)
+    collectors = _collectors.get()
+    if started is None or not collectors:
+        return
+
+    del context._query_started
+    seconds = time.perf_counter() - started
+    for stats in collectors:
+        stats.record(statement, seconds)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    _record(context, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    _record(exception_context.execution_context, exception_context.statement)
+
+
+def init_sql_stats(app):
+    """Collect statistics for every request, log them and, when
+    ``SQL_STATS_HEADER`` is set, return them in an ``X-SQL-Stats`` header."""
+
+    @app.before_request
+    def start_collecting():
+        g.sql_stats = QueryStats()
+        g.sql_stats_token = _collectors.set(_collectors.get() + (g.sql_stats,))
+
+    @app.after_request
+    def report(response):
+        stats = g.get("sql_stats")
+        if stats is None:
+            return response
+
+        threshold = current_app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+        repeated = stats.repeated(threshold)
+        for key, count, statement in repeated:
+            current_app.logger.warning(
+                "possible N+1 on %s: %dx [%s] %s",
+                request.endpoint,
+                count,
+                key,
+                normalize(statement)[:300],
+            )
+
+        current_app.logger.info(
+            "%s %s queries=%d db_ms=%.1f repeated=%d",
+            request.endpoint,
+            request.path,
+            stats.count,
+            stats.seconds * 1000,
+            len(repeated),
+            extra={
+                "status": response.status_code,
+                "query_count": stats.count,
+                "db_ms": round(stats.seconds * 1000, 2),
+                "repeated_queries": len(repeated),
+            },
+        )
+
+        if current_app.config["SQL_STATS_HEADER"]:
+            response.headers["X-SQL-Stats"] = (
+                f"queries={stats.count}; db_ms={stats.seconds * 1000:.1f}; "
+                f"repeated={','.join(key for key, _, _ in repeated) or '-'}"
+            )
+        return response
+
+    @app.teardown_request
+    def stop_collecting(error=None):
+        token = g.pop("sql_stats_token", None)
+        if token is not None:
+            try:
+                _collectors.reset(token)
+            except ValueError:
+                # Streamed responses finish in a different context.
+                pass
@@ -2,3 +2,53 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Typeahead for the navbar search boxes and the show form id inputs,
+// answered by /api/suggest.
+document.addEventListener('DOMContentLoaded', function () {
+  var inputs = document.querySelectorAll('input[data-suggest]');
+
+  Array.prototype.forEach.call(inputs, function (input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var pending = null;
+
+    input.addEventListener('input', function () {
+      clearTimeout(pending);
+      pending = setTimeout(function () {
+        var url = '/api/suggest?type=' + input.dataset.suggest +
+          '&q=' + encodeURIComponent(input.value);
+
+        fetch(url)
+          .then(function (response) { return response.json(); })
+          .then(function (suggestions) {
+            list.innerHTML = '';
+            suggestions.forEach(function (item) {
+              var option = document.createElement('option');
+              if (input.dataset.suggestValue === 'id') {
+                option.value = item.id;
+                option.label = item.name;
+              } else {
+                option.value = item.name;
+              }
+              list.appendChild(option);
+            });
+          });
+      }, 100);
+    });
+  });
+});
+
+// "Load more" past shows on venue and artist pages.
+document.addEventListener('click', function (event) {
+  var button = event.target.closest('.load-more button[data-url]');
+  if (!button) {
+    return;
+  }
+
+  button.disabled = true;
+  fetch(button.dataset.url)
+    .then(function (response) { return response.text(); })
+    .then(function (html) {
+      button.parentNode.outerHTML = html;
+    });
+});
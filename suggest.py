@@ -0,0 +1,124 @@
+import bisect
+import heapq
+import threading
+import time
+
+# ----------------------------------------------------------------------------#
+# In-process prefix index over venue and artist names.
+#
+# Every word start of a name is a key, so "The Musical Hop" is suggested for
+# "the", "mus" and "hop". Keys live in one sorted list per kind searched with
+# bisect. Each worker rebuilds its index from the database after ``ttl``
+# seconds, which bounds how long writes made by other workers are missing.
+# ----------------------------------------------------------------------------#
+
+
+def _name_keys(name):
+    words = (name or "").lower().split()
+    return {" ".join(words[index:]) for index in range(len(words))}
+
+
+class PrefixIndex:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._keys = {}
+        self._names = {}
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self._expires_at
+
+    def refresh(self, load_entries):
+        """Rebuild the index from ``load_entries()`` if its TTL has passed.
+        Only one thread per worker reloads; once the index has been built,
+        the others keep using the old content meanwhile."""
+        if not self.expired:
+            return
+        if not self._load_lock.acquire(blocking=self._expires_at == 0):
+            return
+        try:
+            if self.expired:
+                self.load(load_entries())
+        finally:
+            self._load_lock.release()
+
+    def load(self, entries):
+        """Replace the index content with ``entries``, an iterable of
+        (kind, id, name) tuples."""
+        names = {(kind, entity_id): name for kind, entity_id, name in entries}
+        keys = {}
+        for (kind, entity_id), name in names.items():
+            keys.setdefault(kind, []).extend(
+                (key, entity_id) for key in _name_keys(name)
+            )
+        for kind_keys in keys.values():
+            kind_keys.sort()
+
+        with self._lock:
+            self._keys, self._names = keys, names
+            self._expires_at = time.monotonic() + self.ttl
+
+    def add(self, kind, entity_id, name):
+        with self._lock:
+            self._discard(kind, entity_id)
+            self._names[(kind, entity_id)] = name
+            kind_keys = self._keys.setdefault(kind, [])
+            for key in _name_keys(name):
+                bisect.insort(kind_keys, (key, entity_id))
+
+    def remove(self, kind, entity_id):
+        with self._lock:
+            self._discard(kind, entity_id)
+
+    def _discard(self, kind, entity_id):
+        name = self._names.pop((kind, entity_id), None)
+        if name is None:
+            return
+
+        kind_keys = self._keys[kind]
+        for key in _name_keys(name):
+            index = bisect.bisect_left(kind_keys, (key, entity_id))
+            if index < len(kind_keys) and kind_keys[index] == (key, entity_id):
+                del kind_keys[index]
+
+    def _matches(self, kind, prefix):
+        # (key, kind, id) of ``kind`` whose key starts with ``prefix``, in
+        # key order.
+        kind_keys = self._keys.get(kind, [])
+        index = bisect.bisect_left(kind_keys, (prefix,))
+        while index < len(kind_keys) and kind_keys[index][0].startswith(prefix):
+            key, entity_id = kind_keys[index]
+            yield key, kind, entity_id
+            index += 1
+
+    def suggest(self, prefix, kind=None, limit=10):
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        result = []
+        seen = set()
+
+        with self._lock:
+            kinds = [kind] if kind else sorted(self._keys)
+            for _, entry_kind, entity_id in heapq.merge(
+                *(self._matches(name, prefix) for name in kinds)
+            ):
+                if len(result) >= limit:
+                    break
+                if (entry_kind, entity_id) in seen:
+                    continue
+
+                seen.add((entry_kind, entity_id))
+                result.append(
+                    {
+                        "type": entry_kind,
+                        "id": entity_id,
+                        "name": self._names[(entry_kind, entity_id)],
+                    }
+                )
+
+        return result
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Tests that need Postgres run against TEST_DATABASE_URI, which is dropped
+# and recreated; without it they are skipped.
+TEST_DATABASE_URI = os.environ.get("TEST_DATABASE_URI")
+if TEST_DATABASE_URI:
+    os.environ["FYYUR_DATABASE_URI"] = TEST_DATABASE_URI
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not TEST_DATABASE_URI:
+        pytest.skip("TEST_DATABASE_URI is not set")
+
+    from app import app
+    from models import db
+
+    app.config.update(TESTING=True, PAGE_CACHE_ENABLED=False)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
@@ -0,0 +1,82 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from api import RESOURCES, ApiError
+from models import db, Venue, Artist, Show
+
+
+@pytest.fixture(scope="module")
+def venue_ids(app):
+    venues = [
+        Venue(name=f"API Venue {index}", city="Reno", state="NV", genres=[])
+        for index in range(3)
+    ]
+    db.session.add_all(venues)
+    db.session.commit()
+    return [venue.id for venue in venues]
+
+
+def test_next_link_keeps_only_the_listing_arguments(client, venue_ids):
+    response = client.get("/api/v1/venues?kind=x&limit=1&fields=name&_external=1")
+
+    assert response.status_code == 200
+    next_url = response.get_json()["next"]
+    assert next_url.startswith("/api/v1/venues?")
+    assert "limit=1" in next_url
+    assert "fields=name" in next_url
+    assert "kind=" not in next_url
+
+
+def test_boolean_cursor_is_ignored(client, venue_ids):
+    after = base64.urlsafe_b64encode(b"[true]").decode().rstrip("=")
+    response = client.get(f"/api/v1/venues?after={after}")
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]
+
+
+def _columns(kind, query, includes=()):
+    with Flask(__name__).test_request_context(f"/?{query}"):
+        columns, hidden = RESOURCES[kind].columns(includes)
+    return [column.key for column in columns], hidden
+
+
+def test_fields_select_only_the_named_columns_and_the_id():
+    assert _columns("venues", "fields=name,city") == (["id", "name", "city"], set())
+    assert "version" not in _columns("venues", "")[0]
+
+    with pytest.raises(ApiError):
+        _columns("venues", "fields=name,version")
+
+
+def test_embed_foreign_keys_are_selected_but_hidden():
+    assert _columns("shows", "fields=start_time", {"venue", "artist"}) == (
+        ["id", "start_time", "artist_id", "venue_id"],
+        {"artist_id", "venue_id"},
+    )
+    assert _columns("shows", "fields=venue_id", {"venue"}) == (
+        ["id", "venue_id"],
+        set(),
+    )
+
+
+def test_embeds_without_their_foreign_key_in_fields(client, venue_ids):
+    artist = Artist(name="API Artist", city="Reno", state="NV", genres=[])
+    db.session.add(artist)
+    db.session.flush()
+    show = Show(
+        venue_id=venue_ids[0],
+        artist_id=artist.id,
+        start_time=datetime(2030, 1, 1, tzinfo=timezone.utc),
+    )
+    db.session.add(show)
+    db.session.commit()
+
+    response = client.get(f"/api/v1/shows/{show.id}?fields=start_time&include=venue")
+
+    item = response.get_json()["data"]
+    assert set(item) == {"id", "start_time", "venue"}
+    assert item["venue"]["id"] == venue_ids[0]
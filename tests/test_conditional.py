@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from conditional import conditional_page
+from page_cache import cached_page, page_cache
+
+
+@pytest.fixture()
+def page():
+    """A cached, conditional page whose version and body the test controls,
+    like a row changed by another process that cannot purge this cache."""
+    state = {"version": 1, "body": "first", "renders": 0}
+    app = Flask(__name__)
+    app.config["PAGE_CACHE_ENABLED"] = True
+
+    @app.route("/page")
+    @conditional_page(
+        lambda: ((state["version"],), datetime(2024, 1, 1, tzinfo=timezone.utc))
+    )
+    @cached_page(60, "page")
+    def view():
+        state["renders"] += 1
+        return state["body"]
+
+    page_cache.clear()
+    yield app.test_client(), state
+    page_cache.clear()
+
+
+def test_unchanged_page_is_served_from_cache_and_revalidated(page):
+    client, state = page
+
+    first = client.get("/page")
+    again = client.get("/page")
+    assert again.get_data(as_text=True) == "first"
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert state["renders"] == 1
+
+    revalidated = client.get("/page", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_new_version_is_not_served_from_a_stale_cache_entry(page):
+    client, state = page
+    old_etag = client.get("/page").headers["ETag"]
+
+    state.update(version=2, body="second")
+    response = client.get("/page", headers={"If-None-Match": old_etag})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == "second"
+    assert response.headers["ETag"] != old_etag
+    assert state["renders"] == 2
+
+    revalidated = client.get(
+        "/page", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_if_modified_since(page):
+    client, _ = page
+
+    response = client.get(
+        "/page", headers={"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    )
+    assert response.status_code == 304
+
+    response = client.get(
+        "/page", headers={"If-Modified-Since": "Sun, 31 Dec 2023 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conditional import detail_version, table_version
+from counters import recount_shows, rollover_shows
+from models import db, Venue, Artist, Show
+
+
+@pytest.fixture()
+def venue_and_artist(app, request):
+    # Names are unique per city; each test gets its own pair.
+    name = request.node.name
+    venue = Venue(name=name, city="Omaha", state="NE", genres=[])
+    artist = Artist(name=name, city="Omaha", state="NE", genres=[])
+    db.session.add_all([venue, artist])
+    db.session.commit()
+    return venue, artist
+
+
+def _add_show(venue, artist, start_time):
+    show = Show(venue_id=venue.id, artist_id=artist.id, start_time=start_time)
+    db.session.add(show)
+    db.session.commit()
+    return show
+
+
+def _counts(*entities):
+    for entity in entities:
+        db.session.refresh(entity)
+    return [
+        (entity.upcoming_shows_count, entity.past_shows_count) for entity in entities
+    ]
+
+
+def test_new_and_deleted_shows_are_counted(venue_and_artist):
+    venue, artist = venue_and_artist
+    now = datetime.now(timezone.utc)
+
+    _add_show(venue, artist, now + timedelta(days=1))
+    past_show = _add_show(venue, artist, now - timedelta(days=1))
+    assert _counts(venue, artist) == [(1, 1), (1, 1)]
+
+    db.session.delete(past_show)
+    db.session.commit()
+    assert _counts(venue, artist) == [(1, 0), (1, 0)]
+
+
+def test_rollover_moves_started_shows_and_bumps_versions(venue_and_artist):
+    venue, artist = venue_and_artist
+    start_time = datetime.now(timezone.utc) + timedelta(hours=1)
+    _add_show(venue, artist, start_time)
+    _add_show(venue, artist, start_time + timedelta(days=30))
+
+    venue_version = detail_version(Venue, Artist, venue.id)[0]
+    shows_version = table_version(Show)[0]
+
+    assert rollover_shows(now=start_time + timedelta(minutes=1)) >= 1
+    db.session.commit()
+
+    assert _counts(venue, artist) == [(1, 1), (1, 1)]
+    assert detail_version(Venue, Artist, venue.id)[0] != venue_version
+    assert table_version(Show)[0] != shows_version
+
+
+def test_recount_rebuilds_the_counters(venue_and_artist):
+    venue, artist = venue_and_artist
+    now = datetime.now(timezone.utc)
+    _add_show(venue, artist, now + timedelta(days=1))
+    _add_show(venue, artist, now - timedelta(days=1))
+
+    db.session.execute(
+        Venue.__table__.update()
+        .where(Venue.id == venue.id)
+        .values(upcoming_shows_count=7, past_shows_count=7)
+    )
+    recount_shows()
+    db.session.commit()
+
+    assert _counts(venue, artist) == [(1, 1), (1, 1)]
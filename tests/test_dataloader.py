@@ -0,0 +1,57 @@
+from dataloader import DataLoader
+
+
+class RecordingBatch:
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    def __call__(self, keys):
+        self.calls.append(keys)
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+def test_queued_keys_are_fetched_in_one_batch():
+    batch = RecordingBatch({1: "a", 2: "b", 3: "c"})
+    loader = DataLoader(batch)
+
+    first, second, again = loader.load(1), loader.load(2), loader.load(1)
+    assert batch.calls == []
+
+    assert (first.get(), second.get(), again.get()) == ("a", "b", "a")
+    assert batch.calls == [[1, 2]]
+
+
+def test_loaded_keys_are_not_fetched_again():
+    batch = RecordingBatch({1: "a", 2: "b"})
+    loader = DataLoader(batch)
+    loader.load(1).get()
+
+    assert loader.load(1).get() == "a"
+    assert loader.get(2) == "b"
+    assert batch.calls == [[1], [2]]
+
+
+def test_missing_keys_are_cached_as_none():
+    batch = RecordingBatch({})
+    loader = DataLoader(batch)
+
+    assert loader.load(5).get() is None
+    assert loader.load(5).get() is None
+    assert batch.calls == [[5]]
+
+
+def test_none_key_is_never_fetched():
+    batch = RecordingBatch({1: "a"})
+    loader = DataLoader(batch)
+
+    assert loader.load(None).get() is None
+    assert batch.calls == []
+
+
+def test_load_many_keeps_the_requested_order():
+    batch = RecordingBatch({1: "a", 2: "b", 3: "c"})
+    loader = DataLoader(batch)
+
+    assert loader.load_many([3, 9, 1, 3]) == ["c", None, "a", "c"]
+    assert batch.calls == [[3, 9, 1]]
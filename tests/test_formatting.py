@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+from babel.dates import format_datetime as babel_format_datetime
+
+from formatting import format_datetime, format_many
+
+UTC_TIME = datetime(2024, 5, 3, 20, 30, tzinfo=timezone.utc)
+# The same instant in another offset.
+PACIFIC_TIME = UTC_TIME.astimezone(timezone(timedelta(hours=-7)))
+
+
+def test_matches_babel_for_named_locale_formats():
+    # "medium" and "full" are overridden by FORMATS.
+    for format in ("short", "long"):
+        assert format_datetime(UTC_TIME, format, "de") == babel_format_datetime(
+            UTC_TIME, format, locale="de"
+        )
+
+
+def test_repo_formats_and_patterns():
+    assert format_datetime(UTC_TIME, "full") == "Friday May, 3, 2024 at 8:30PM"
+    assert format_datetime(UTC_TIME, "yyyy-MM-dd") == "2024-05-03"
+
+
+def test_equal_instants_in_different_offsets_format_differently():
+    assert PACIFIC_TIME == UTC_TIME
+
+    utc = format_datetime(UTC_TIME, "HH:mm")
+    pacific = format_datetime(PACIFIC_TIME, "HH:mm")
+    assert (utc, pacific) == ("20:30", "13:30")
+    assert format_many([UTC_TIME, PACIFIC_TIME], "HH:mm") == [utc, pacific]
+
+
+def test_iso_strings_and_naive_values_are_taken_as_utc():
+    values = ["2024-05-03T20:30:00", datetime(2024, 5, 3, 20, 30)]
+
+    assert format_many(values, "HH:mm") == ["20:30", "20:30"]
@@ -0,0 +1,53 @@
+from helper import group_by, group_by_multiple_key
+
+
+def test_group_by_keeps_first_seen_key_order():
+    items = [("b", 1), ("a", 2), ("b", 3)]
+
+    assert group_by(items, lambda item: item[0]) == {
+        "b": [("b", 1), ("b", 3)],
+        "a": [("a", 2)],
+    }
+    assert list(group_by(items, lambda item: item[0])) == ["b", "a"]
+
+
+def test_group_by_applies_value_selector():
+    items = [("b", 1), ("a", 2), ("b", 3)]
+
+    assert group_by(items, lambda item: item[0], lambda item: item[1]) == {
+        "b": [1, 3],
+        "a": [2],
+    }
+
+
+def test_group_by_of_nothing_is_empty():
+    assert group_by([], lambda item: item) == {}
+
+
+def test_group_by_multiple_key_matches_presorted_grouping():
+    rows = [
+        {"city": "Oakland", "state": "CA", "id": 1},
+        {"city": "Oakland", "state": "CA", "id": 2},
+        {"city": "Austin", "state": "TX", "id": 3},
+    ]
+    args = (
+        lambda row: (row["city"], row["state"]),
+        lambda row: row["id"],
+        ["city", "state"],
+        "venues",
+    )
+
+    expected = [
+        {"city": "Oakland", "state": "CA", "venues": [1, 2]},
+        {"city": "Austin", "state": "TX", "venues": [3]},
+    ]
+    assert group_by_multiple_key(rows, *args) == expected
+    assert group_by_multiple_key(rows, *args, presorted=True) == expected
+
+
+def test_group_by_multiple_key_merges_unsorted_runs():
+    rows = [("CA", 1), ("TX", 2), ("CA", 3)]
+
+    assert group_by_multiple_key(
+        rows, lambda row: (row[0],), lambda row: row[1], ["state"]
+    ) == [{"state": "CA", "values": [1, 3]}, {"state": "TX", "values": [2]}]
@@ -0,0 +1,84 @@
+import json
+
+from flask import Flask
+
+from importer import _formdata, _validate_chunk, import_file, read_rows
+from models import db, Venue, Artist, Show
+
+VENUE_CSV = """name,city,state,address,phone,genres,facebook_link
+Import Hall,Tulsa,OK,1 Main St,918-555-0100,"Jazz, Blues",https://facebook.com/ih
+Import Hall,Tulsa,OK,2 Main St,918-555-0100,Jazz,https://facebook.com/ih
+Bad Phone,Tulsa,OK,3 Main St,nope,Jazz,https://facebook.com/bp
+"""
+
+
+def test_read_rows_numbers_file_lines(tmp_path):
+    csv_path = tmp_path / "venues.csv"
+    csv_path.write_text(VENUE_CSV)
+    jsonl_path = tmp_path / "venues.jsonl"
+    jsonl_path.write_text('{"name": "A"}\n\n{"name": "B"}\n')
+
+    assert [number for number, _ in read_rows(str(csv_path))] == [2, 3, 4]
+    assert list(read_rows(str(jsonl_path))) == [(1, {"name": "A"}), (3, {"name": "B"})]
+
+
+def test_formdata_matches_what_the_web_forms_post():
+    formdata = _formdata(
+        {"genres": "Jazz, Blues", "seeking_talent": True, "phone": None, "id": 3}
+    )
+
+    assert formdata.getlist("genres") == ["Jazz", "Blues"]
+    assert formdata["seeking_talent"] == "y"
+    assert "phone" not in formdata
+    assert formdata["id"] == "3"
+    assert "seeking_talent" not in _formdata({"seeking_talent": False})
+
+
+def test_validate_chunk_keeps_model_columns_and_reports_errors(tmp_path):
+    csv_path = tmp_path / "venues.csv"
+    csv_path.write_text(VENUE_CSV)
+
+    with Flask(__name__).app_context():
+        valid, rejected = _validate_chunk("venue", list(read_rows(str(csv_path))))
+
+    assert [number for number, _ in valid] == [2, 3]
+    assert valid[0][1]["genres"] == ["Jazz", "Blues"]
+    assert "id" not in valid[0][1]
+    assert [(number, list(errors)) for number, errors in rejected] == [(4, ["phone"])]
+
+
+def test_import_upserts_on_the_natural_key(app, tmp_path):
+    csv_path = tmp_path / "venues.csv"
+    csv_path.write_text(VENUE_CSV)
+
+    for _ in range(2):
+        processed, imported, rejected, _ = import_file(
+            "venue", str(csv_path), workers=1
+        )
+        # The repeated key is written once, as its last row.
+        assert (processed, imported, rejected) == (3, 1, 1)
+
+    venues = Venue.query.filter_by(name="Import Hall").all()
+    assert [venue.address for venue in venues] == ["2 Main St"]
+
+
+def test_reimported_shows_are_not_counted(app, tmp_path):
+    venue = Venue(name="Show Import Hall", city="Tulsa", state="OK", genres=[])
+    artist = Artist(name="Show Import Band", city="Tulsa", state="OK", genres=[])
+    db.session.add_all([venue, artist])
+    db.session.commit()
+
+    jsonl_path = tmp_path / "shows.jsonl"
+    rows = [
+        {
+            "venue_id": venue.id,
+            "artist_id": artist.id,
+            "start_time": "2030-01-01 20:00:00",
+        },
+        {"venue_id": venue.id, "artist_id": 0, "start_time": "2030-01-01 20:00:00"},
+    ]
+    jsonl_path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    assert import_file("show", str(jsonl_path), workers=1)[:3] == (2, 1, 1)
+    assert import_file("show", str(jsonl_path), workers=1)[:3] == (2, 0, 1)
+    assert Show.query.filter_by(venue_id=venue.id).count() == 1
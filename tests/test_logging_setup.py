@@ -0,0 +1,62 @@
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+
+import pytest
+from flask import Flask
+
+import logging_setup
+from logging_setup import LockingRotatingFileHandler, JsonFormatter, configure_logging
+
+
+def _app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        LOG_FILE=str(tmp_path / "app.log"),
+        LOG_LEVEL="INFO",
+        LOG_MAX_BYTES=1024,
+        LOG_MAX_AGE=60,
+        LOG_BACKUP_COUNT=2,
+        LOG_QUEUE_SIZE=10,
+        LOG_SAMPLE_RATES={},
+    )
+    return app
+
+
+def test_json_formatter_keeps_extra_fields():
+    record = logging.makeLogRecord(
+        {"name": "app", "levelno": logging.INFO, "levelname": "INFO", "msg": "hi"}
+    )
+    record.route = "venues"
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "hi"
+    assert data["route"] == "venues"
+    assert "source" not in data
+
+
+@pytest.mark.skipif(logging_setup.fcntl is None, reason="needs flock")
+def test_locking_handler_rotates_by_size(tmp_path):
+    handler = LockingRotatingFileHandler(str(tmp_path / "app.log"), 100, 0, 2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for index in range(5):
+        handler.emit(logging.makeLogRecord({"msg": f"{index}" * 40}))
+    handler.close()
+
+    assert (tmp_path / "app.log").read_text() == "4" * 40 + "\n"
+    assert (tmp_path / "app.log.1").read_text() == "2" * 40 + "\n" + "3" * 40 + "\n"
+    assert not (tmp_path / "app.log.3").exists()
+
+
+def test_without_flock_falls_back_to_size_rotation(tmp_path, monkeypatch):
+    monkeypatch.setattr(logging_setup, "fcntl", None)
+    app = _app(tmp_path)
+
+    handler = configure_logging(app)
+    try:
+        [file_handler] = handler.target_handlers
+        assert type(file_handler) is RotatingFileHandler
+        assert file_handler.maxBytes == 1024
+    finally:
+        app.logger.removeHandler(handler)
+        file_handler.close()
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from sqlalchemy.exc import IntegrityError
+
+from app import app as flask_app, duplicate_message
+
+VENUE = {
+    "name": "Duplicate Hall",
+    "city": "Boise",
+    "state": "ID",
+    "address": "1 Main St",
+    "phone": "208-555-0100",
+    "genres": "Jazz",
+    "facebook_link": "https://www.facebook.com/duplicatehall",
+}
+
+
+def _integrity_error(constraint_name):
+    orig = SimpleNamespace(diag=SimpleNamespace(constraint_name=constraint_name))
+    return IntegrityError("INSERT ...", {}, orig)
+
+
+def test_duplicate_message_names_the_clashing_listing():
+    with flask_app.test_request_context("/venues/create", method="POST", data=VENUE):
+        assert duplicate_message(_integrity_error("uq_venue_name_city_state")) == (
+            "Duplicate Hall is already listed in Boise, ID."
+        )
+        assert duplicate_message(_integrity_error("Show_venue_id_fkey")) is None
+        assert duplicate_message(IntegrityError("INSERT ...", {}, None)) is None
+
+
+def test_creating_a_duplicate_venue_is_reported(client):
+    assert client.post("/venues/create", data=VENUE).status_code == 302
+
+    response = client.post("/venues/create", data=VENUE)
+    html = response.get_data(as_text=True)
+    assert "Duplicate Hall is already listed in Boise, ID." in html
+    assert "contact page admin" not in html
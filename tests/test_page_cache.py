@@ -0,0 +1,70 @@
+import gzip
+import time
+
+from page_cache import PageCache
+
+
+def test_stores_compressed_body():
+    cache = PageCache()
+    cache.set("/venues", b"<html>venues</html>", "text/html", 60, {"venues:list"})
+
+    entry = cache.get("/venues")
+    assert gzip.decompress(entry.body) == b"<html>venues</html>"
+    assert entry.mimetype == "text/html"
+    assert entry.tags == {"venues:list"}
+    assert cache.get("/artists") is None
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = PageCache()
+    cache.set("/venues", b"body", "text/html", 60, {"venues:list"})
+
+    later = time.monotonic() + 61
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert cache.get("/venues") is None
+
+
+def test_purge_removes_every_page_with_the_tag():
+    cache = PageCache()
+    cache.set("/venues/1", b"1", "text/html", 60, {"venue:1", "artist:7"})
+    cache.set("/venues/2", b"2", "text/html", 60, {"venue:2", "artist:7"})
+    cache.set("/venues/3", b"3", "text/html", 60, {"venue:3"})
+
+    cache.purge("artist:7", "unknown")
+
+    assert cache.get("/venues/1") is None
+    assert cache.get("/venues/2") is None
+    assert cache.get("/venues/3") is not None
+    # Purged keys no longer hold on to their other tags.
+    cache.purge("venue:1")
+    assert cache.get("/venues/3") is not None
+
+
+def test_replacing_an_entry_drops_its_old_tags():
+    cache = PageCache()
+    cache.set("/shows", b"old", "text/html", 60, {"old"})
+    cache.set("/shows", b"new", "text/html", 60, {"new"})
+
+    cache.purge("old")
+    assert gzip.decompress(cache.get("/shows").body) == b"new"
+
+
+def test_evicts_least_recently_used():
+    cache = PageCache(max_entries=2)
+    cache.set("/a", b"a", "text/html", 60, ())
+    cache.set("/b", b"b", "text/html", 60, ())
+    cache.get("/a")
+    cache.set("/c", b"c", "text/html", 60, ())
+
+    assert cache.get("/a") is not None
+    assert cache.get("/b") is None
+    assert cache.get("/c") is not None
+
+
+def test_clear():
+    cache = PageCache()
+    cache.set("/a", b"a", "text/html", 60, {"tag"})
+    cache.clear()
+
+    assert cache.get("/a") is None
+    cache.purge("tag")
@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import column
+
+from pagination import (
+    after_cursor,
+    decode_area_cursor,
+    decode_cursor,
+    decode_time_cursor,
+    encode_cursor,
+    is_id,
+)
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(("CA", "San Francisco", 42))
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == ["CA", "San Francisco", 42]
+
+
+def test_cursor_stores_datetimes_as_iso_strings():
+    start_time = datetime(2024, 5, 3, 20, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor((start_time, 7))
+
+    assert decode_cursor(cursor, 2) == [start_time.isoformat(), 7]
+    assert decode_time_cursor(cursor) == (start_time, 7)
+
+
+def test_malformed_cursors_are_ignored():
+    assert decode_cursor(None, 1) is None
+    assert decode_cursor("", 1) is None
+    assert decode_cursor("not base64!", 1) is None
+    assert decode_cursor(_raw_cursor("{not json"), 1) is None
+    assert decode_cursor(_raw_cursor('{"a": 1}'), 1) is None
+    # Wrong number of values.
+    assert decode_cursor(encode_cursor((1, 2)), 3) is None
+
+
+def test_time_cursor_checks_value_types():
+    for values in (
+        [{}, 1],
+        ["2024-01-01", "x"],
+        ["2024-01-01", True],
+        ["yesterday", 1],
+        [20240101, 1],
+    ):
+        assert decode_cursor(_raw_cursor(json.dumps(values)), 2) == values
+        assert decode_time_cursor(_raw_cursor(json.dumps(values))) is None
+
+
+def test_area_cursor_checks_value_types():
+    assert decode_area_cursor(encode_cursor(("CA", "", 3))) == ("CA", "", 3)
+    for values in (["CA", None, 3], [None, "Oakland", 3], ["CA", "Oakland", True]):
+        assert decode_area_cursor(_raw_cursor(json.dumps(values))) is None
+
+
+def test_is_id():
+    assert is_id(7)
+    assert not is_id(True)
+    assert not is_id("7")
+    assert not is_id(7.0)
+
+
+def test_after_cursor_compares_row_values():
+    columns = (column("start_time"), column("id"))
+
+    assert str(after_cursor(columns, ("a", 1))) == (
+        "(start_time, id) > (:param_1, :param_2)"
+    )
+    assert str(after_cursor(columns, ("a", 1), descending=True)) == (
+        "(start_time, id) < (:param_1, :param_2)"
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models import db, Venue, Artist, Show
+from sql_instrumentation import query_budget
+
+# Each page must run a fixed number of statements however many rows it
+# lists: one version lookup for the conditional GET and one for the page.
+VENUES = 3
+ARTISTS = 4
+SHOWS_PER_VENUE = 6
+
+
+@pytest.fixture(scope="module")
+def venue_id(app):
+    now = datetime.now(timezone.utc)
+    venues = [
+        Venue(name=f"Venue {index}", city="San Francisco", state="CA", genres=["Jazz"])
+        for index in range(VENUES)
+    ]
+    artists = [
+        Artist(name=f"Artist {index}", city="Oakland", state="CA", genres=["Jazz"])
+        for index in range(ARTISTS)
+    ]
+    db.session.add_all(venues + artists)
+    db.session.flush()
+
+    db.session.add_all(
+        Show(
+            venue_id=venue.id,
+            artist_id=artists[index % ARTISTS].id,
+            # Half of them in the past, half upcoming.
+            start_time=now + timedelta(days=index - SHOWS_PER_VENUE // 2),
+        )
+        for venue in venues
+        for index in range(SHOWS_PER_VENUE)
+    )
+    db.session.commit()
+    return venues[0].id
+
+
+@pytest.mark.parametrize(
+    "url, budget",
+    [
+        ("/venues", 2),
+        ("/venues/{venue_id}", 2),
+        ("/shows", 2),
+    ],
+)
+def test_route_query_budget(client, venue_id, url, budget):
+    url = url.format(venue_id=venue_id)
+    # The first request on a fresh connection also runs the dialect's setup
+    # queries.
+    client.get(url)
+
+    with query_budget(budget):
+        response = client.get(url)
+
+    assert response.status_code == 200
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import app as flask_app, datetime_arg, month_window
+from models import db, Venue, Artist, Show
+
+
+def _datetime_arg(query, name, **kwargs):
+    with flask_app.test_request_context(f"/shows?{query}"):
+        return datetime_arg(name, **kwargs)
+
+
+def test_datetime_arg_takes_naive_values_as_utc():
+    assert _datetime_arg("from=2024-05-03T20:30", "from") == datetime(
+        2024, 5, 3, 20, 30, tzinfo=timezone.utc
+    )
+    assert _datetime_arg("from=2024-05-03T20:30-07:00", "from") == datetime(
+        2024, 5, 4, 3, 30, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.parametrize("query", ["", "from=", "from=tomorrow", "from=2024-13-01"])
+def test_datetime_arg_ignores_missing_and_malformed_values(query):
+    assert _datetime_arg(query, "from") is None
+
+
+def test_date_only_upper_bound_includes_that_day():
+    assert _datetime_arg("to=2024-05-03", "to", end_of_day=True) == datetime(
+        2024, 5, 4, tzinfo=timezone.utc
+    )
+    assert _datetime_arg("to=2024-05-03T12:00", "to", end_of_day=True) == datetime(
+        2024, 5, 3, 12, tzinfo=timezone.utc
+    )
+
+
+def test_upper_bound_on_the_last_representable_day_is_dropped():
+    assert _datetime_arg("to=9999-12-31", "to", end_of_day=True) is None
+
+
+def _month_window(query):
+    with flask_app.test_request_context(f"/venues/1/calendar?{query}"):
+        return month_window()
+
+
+def test_month_window():
+    assert _month_window("month=2024-12") == (
+        datetime(2024, 12, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+@pytest.mark.parametrize(
+    "query", ["", "month=2024-13", "month=someday", "month=0001-01", "month=9999-12"]
+)
+def test_month_window_falls_back_to_the_current_month(query):
+    now = datetime.now(timezone.utc)
+    start, end = _month_window(query)
+
+    assert start == datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+    assert start <= now < end
+    assert end - start <= timedelta(days=31)
+
+
+@pytest.fixture(scope="module")
+def shows_in_testville(app):
+    venue = Venue(name="Testville Hall", city="Testville", state="CA", genres=[])
+    artist = Artist(name="Testville Trio", city="Testville", state="CA", genres=[])
+    db.session.add_all([venue, artist])
+    db.session.flush()
+
+    now = datetime.now(timezone.utc)
+    db.session.add_all(
+        Show(
+            venue_id=venue.id, artist_id=artist.id, start_time=now + timedelta(days=day)
+        )
+        for day in range(1, 4)
+    )
+    db.session.commit()
+
+
+def test_next_page_link_keeps_only_the_filters(client, shows_in_testville, monkeypatch):
+    monkeypatch.setitem(flask_app.config, "SHOWS_PAGE_SIZE", 1)
+
+    response = client.get("/shows?city=Testville&endpoint=x&_anchor=y&after=z")
+    html = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert "city=Testville" in html
+    assert "endpoint=x" not in html
+    assert "#y" not in html
@@ -0,0 +1,87 @@
+from suggest import PrefixIndex
+
+ENTRIES = [
+    ("venue", 1, "The Musical Hop"),
+    ("venue", 2, "Park Square Live Music & Coffee"),
+    ("artist", 1, "Guns N Petals"),
+    ("artist", 2, "The Wild Sax Band"),
+]
+
+
+def _index(entries=ENTRIES):
+    index = PrefixIndex()
+    index.load(entries)
+    return index
+
+
+def _ids(suggestions):
+    return [(item["type"], item["id"]) for item in suggestions]
+
+
+def test_matches_any_word_start_case_insensitively():
+    index = _index()
+
+    assert _ids(index.suggest("mus")) == [("venue", 2), ("venue", 1)]
+    assert _ids(index.suggest("HOP")) == [("venue", 1)]
+    assert _ids(index.suggest("the")) == [("venue", 1), ("artist", 2)]
+    assert _ids(index.suggest("usical")) == []
+
+
+def test_matches_multi_word_prefixes():
+    index = _index()
+
+    assert _ids(index.suggest("  wild   sa ")) == [("artist", 2)]
+
+
+def test_filters_by_kind():
+    index = _index()
+
+    assert _ids(index.suggest("the", kind="venue")) == [("venue", 1)]
+    assert _ids(index.suggest("the", kind="artist")) == [("artist", 2)]
+    assert index.suggest("the", kind="show") == []
+
+
+def test_returns_each_entity_once_and_respects_limit():
+    index = _index([("venue", 1, "Hop Hop Hop"), ("venue", 2, "Hopper")])
+
+    assert _ids(index.suggest("hop")) == [("venue", 1), ("venue", 2)]
+    assert _ids(index.suggest("hop", limit=1)) == [("venue", 1)]
+
+
+def test_empty_prefix_suggests_nothing():
+    assert _index().suggest("   ") == []
+
+
+def test_add_replaces_the_previous_name():
+    index = _index()
+    index.add("venue", 1, "Blue Note")
+
+    assert index.suggest("musical") == []
+    assert index.suggest("blue") == [{"type": "venue", "id": 1, "name": "Blue Note"}]
+
+
+def test_remove():
+    index = _index()
+    index.remove("artist", 1)
+    index.remove("artist", 99)
+
+    assert index.suggest("guns") == []
+
+
+def test_refresh_reloads_only_after_ttl():
+    loads = []
+
+    def load_entries():
+        loads.append(1)
+        return ENTRIES[: len(loads)]
+
+    index = PrefixIndex(ttl=300)
+    index.refresh(load_entries)
+    index.refresh(load_entries)
+    assert len(loads) == 1
+
+    index.ttl = 0
+    index.load(ENTRIES[:1])
+    index.refresh(load_entries)
+    assert len(loads) == 2
+    assert _ids(index.suggest("park")) == [("venue", 2)]
@@ -0,0 +1,30 @@
+import re
+from html import unescape
+
+from app import app as flask_app
+from models import db, Venue
+
+
+def test_next_links_reach_venues_without_a_city(client, monkeypatch):
+    venues = [
+        Venue(name="Cityless A", state="ZZ", genres=[]),
+        Venue(name="Cityless B", state="ZZ", city="", genres=[]),
+        Venue(name="Stateless", city="Nowhere", genres=[]),
+        Venue(name="Placeless", genres=[]),
+        Venue(name="Last", state="ZZZ", city="Reno", genres=[]),
+    ]
+    db.session.add_all(venues)
+    db.session.commit()
+    monkeypatch.setitem(flask_app.config, "VENUES_PAGE_SIZE", 1)
+
+    listed = set()
+    url = "/venues"
+    for _ in range(100):
+        html = client.get(url).get_data(as_text=True)
+        listed.update(re.findall(r'href="/venues/(\d+)"', html))
+        next_link = re.search(r'href="(/venues\?after=[^"]+)"', html)
+        if next_link is None:
+            break
+        url = unescape(next_link.group(1))
+
+    assert {str(venue.id) for venue in venues} <= listed
@@ -0,0 +1,253 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from sql_instrumentation import normalize
+
+# ----------------------------------------------------------------------------#
+# Request tracing.
+#
+# A sampled request gets a trace id and a root span; SQL statements, template
+# renders and cache lookups made while it runs become child spans. Finished
+# traces are appended as JSON lines (one span per line, OTLP-like field names)
+# to TRACE_FILE by a background thread. Unsampled requests only pay for one
+# context variable lookup per instrumented call.
+# ----------------------------------------------------------------------------#
+
+_current_span = ContextVar("current_span", default=None)
+
+# W3C trace context: version-trace_id-parent_id-flags.
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _new_id(bytes_):
+    return os.urandom(bytes_).hex()
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "attributes",
+        "start",
+        "end_time",
+        "_token",
+    )
+
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end_time = None
+        self._token = _current_span.set(self)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.end_time = time.time_ns()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended in another context (e.g. a streamed response).
+            pass
+        self.trace.spans.append(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start,
+            "end_time_unix_nano": self.end_time,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or _new_id(16)
+        self.spans = []
+
+
+def start_span(name, **attributes):
+    """Start a child of the current span, or return a no-op span when the
+    current request is not traced. Call ``end()`` on the result."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    finally:
+        current.end()
+
+
+def current_trace_id():
+    current = _current_span.get()
+    return None if current is None else current.trace.trace_id
+
+
+class JsonlExporter:
+    """Append finished traces to ``path`` from a background thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        self._ensure_thread()
+        self._queue.put(trace)
+
+    def _ensure_thread(self):
+        # Started lazily so each forked worker gets its own thread.
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="trace-exporter", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            traces = [self._queue.get()]
+            while not self._queue.empty():
+                traces.append(self._queue.get())
+
+            lines = [
+                json.dumps(item.to_dict(), default=str, separators=(",", ":"))
+                for trace in traces
+                for item in trace.spans
+            ]
+            with open(self.path, "a") as file:
+                file.write("\n".join(lines) + "\n")
+
+
+def _incoming_trace():
+    """(trace id, parent span id, sampled) from a traceparent header."""
+    match = TRACEPARENT.match(request.headers.get("traceparent", ""))
+    if match is None:
+        return None, None, None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+# The span lives on the statement's execution context, so a statement that
+# raises cannot leave it open on a pooled connection for the next request.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_span(conn, cursor, statement, parameters, context, many):
+    if context is not None and _current_span.get() is not None:
+        context._trace_span = start_span(
+            "db.query", **{"db.statement": normalize(statement)[:1000]}
+        )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query_span(conn, cursor, statement, parameters, context, many):
+    query_span = getattr(context, "_trace_span", None)
+    if query_span is not None:
+        del context._trace_span
+        query_span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_query_span(exception_context):
+    context = exception_context.execution_context
+    query_span = getattr(context, "_trace_span", None)
+    if query_span is not None:
+        del context._trace_span
+        query_span.set("error", repr(exception_context.original_exception))
+        query_span.end()
+
+
+def init_tracing(app):
+    """Trace a ``TRACE_SAMPLE_RATE`` share of requests, plus those arriving
+    with a sampled W3C traceparent header, into ``TRACE_FILE``."""
+    exporter = JsonlExporter(app.config["TRACE_FILE"])
+
+    @app.before_request
+    def start_trace():
+        trace_id, parent_id, sampled = _incoming_trace()
+        if sampled is None:
+            sampled = random.random() < app.config["TRACE_SAMPLE_RATE"]
+        if not sampled:
+            return
+
+        g.trace_root = Span(
+            Trace(trace_id),
+            "http.request",
+            parent_id,
+            {
+                "http.method": request.method,
+                "http.target": request.full_path,
+                "http.route": request.url_rule.rule if request.url_rule else None,
+            },
+        )
+
+    @app.after_request
+    def tag_response(response):
+        root = g.get("trace_root")
+        if root is not None:
+            root.set("http.status_code", response.status_code)
+            response.headers["X-Trace-Id"] = root.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def finish_trace(error=None):
+        root = g.pop("trace_root", None)
+        if root is not None:
+            if error is not None:
+                root.set("error", repr(error))
+            root.end()
+            exporter.export(root.trace)
+
+    def start_render(sender, template, context, **extra):
+        if _current_span.get() is None:
+            return
+        g.setdefault("render_spans", []).append(
+            start_span("template.render", template=template.name)
+        )
+
+    def end_render(sender, template, context, **extra):
+        spans = g.get("render_spans")
+        if spans:
+            spans.pop().end()
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(end_render, app, weak=False)